@@ -1,11 +1,19 @@
-from flask import Flask, current_app, jsonify, request
-from google.cloud import datastore
+from dataclasses import asdict
+
+from flask import Flask, Response, current_app, jsonify, request, stream_with_context
 
 from data_sources.call_history_data import CallHistoryClient
 from functions.datastore_functions import get_questionnaires
+from functions.google_client_functions import get_datastore_client
 from functions.request_handlers import (
+    MAX_PAGE_SIZE,
+    cursor_handler,
     date_handler,
+    include_handler,
+    interviewers_handler,
+    page_size_handler,
     questionnaire_handler,
+    response_format_handler,
     survey_tla_handler,
 )
 from models.config_model import Config
@@ -17,8 +25,17 @@ from reports.appointment_resource_planning_report import (
     get_appointment_questionnaires,
     get_appointment_resource_planning_by_date,
 )
-from reports.interviewer_call_history_report import get_call_history_report
-from reports.interviewer_call_pattern_report import get_call_pattern_report
+from reports.interviewer_call_heatmap_report import get_call_heatmap_report
+from reports.interviewer_call_history_report import (
+    get_call_history_report,
+    get_call_history_report_page,
+    get_call_history_report_with_call_pattern,
+    iter_call_history_report,
+)
+from reports.interviewer_call_pattern_report import (
+    get_call_pattern_report,
+    get_team_call_pattern_report,
+)
 
 app = Flask(__name__)
 
@@ -29,7 +46,7 @@ def load_config(application):
 
 
 def setup_app(application):
-    datastore_client = datastore.Client()
+    datastore_client = get_datastore_client()
     application.call_history_client = CallHistoryClient(
         datastore_client, application.configuration
     )
@@ -45,6 +62,48 @@ def call_history(interviewer):
     start_date, end_date = date_handler(request)
     survey_tla = survey_tla_handler(request)
     questionnaires = questionnaire_handler(request)
+    page_size = page_size_handler(request)
+    cursor = cursor_handler(request)
+    response_format = response_format_handler(request)
+    includes = include_handler(request)
+    if "call-pattern" in includes:
+        if response_format == "ndjson" or page_size is not None or cursor is not None:
+            raise BertException(
+                "Invalid request, include=call-pattern cannot be used with page-size, cursor or the ndjson format",
+                400,
+            )
+        return jsonify(
+            get_call_history_report_with_call_pattern(
+                interviewer, start_date, end_date, survey_tla, questionnaires
+            )
+        )
+    if response_format == "ndjson":
+        if page_size is not None or cursor is not None:
+            raise BertException(
+                "Invalid request, page-size and cursor cannot be used with the ndjson format",
+                400,
+            )
+        records = iter_call_history_report(
+            interviewer, start_date, end_date, survey_tla, questionnaires
+        )
+        return Response(
+            stream_with_context(
+                f"{current_app.json.dumps(record)}\n" for record in records
+            ),
+            mimetype="application/x-ndjson",
+        )
+    if page_size is not None or cursor is not None:
+        return jsonify(
+            get_call_history_report_page(
+                interviewer,
+                start_date,
+                end_date,
+                survey_tla,
+                questionnaires,
+                page_size or MAX_PAGE_SIZE,
+                cursor,
+            )
+        )
     return jsonify(
         get_call_history_report(
             interviewer, start_date, end_date, survey_tla, questionnaires
@@ -73,6 +132,35 @@ def call_pattern(interviewer):
         return results.json()
 
 
+@app.route("/api/reports/call-heatmap/<interviewer>")
+def call_heatmap(interviewer):
+    start_date, end_date = date_handler(request)
+    survey_tla = survey_tla_handler(request)
+    questionnaires = questionnaire_handler(request)
+    return jsonify(
+        get_call_heatmap_report(
+            interviewer, start_date, end_date, survey_tla, questionnaires
+        )
+    )
+
+
+@app.route("/api/reports/team-call-pattern")
+def team_call_pattern():
+    start_date, end_date = date_handler(request)
+    survey_tla = survey_tla_handler(request)
+    if survey_tla is None:
+        raise BertException(
+            "Invalid request, missing required survey-tla parameter", 400
+        )
+    interviewers = interviewers_handler(request)
+    results = get_team_call_pattern_report(
+        start_date, end_date, survey_tla, interviewers
+    )
+    return jsonify(
+        {interviewer: asdict(result) for interviewer, result in results.items()}
+    )
+
+
 @app.route("/api/reports/appointment-resource-planning/<date>")
 def appointment_resource_planning(date):
     survey_tla = survey_tla_handler(request)
@@ -1,16 +1,41 @@
-import asyncio
-from dataclasses import asdict
-from datetime import datetime
+import hashlib
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time, timedelta, timezone
+from itertools import islice
 
 from dateutil.relativedelta import relativedelta
 from google.cloud import datastore
 
-from data_sources.cati_data import get_cati_call_history_from_database
+from data_sources.cati_data import (
+    get_cati_call_history_fingerprint_from_database,
+    get_cati_call_history_from_database,
+)
 from data_sources.questionnaire_data import get_questionnaire_name
+from functions.datastore_batch_functions import process_batches_concurrently
+from functions.datastore_functions import (
+    identify_invalid_phone_number_cases,
+    identify_webnudge_cases,
+)
 from models.call_history_model import CallHistory
+from models.interviewer_daily_summary_model import InterviewerDailySummary
 
 
 class CallHistoryClient:
+    FULL_RECONCILE_INTERVAL = timedelta(days=7)
+    LOOKUP_BATCH_SIZE = 1000
+    EXTRACTION_BATCH_SIZE = 5000
+    UPLOAD_WORKERS = 4
+    DELETE_BATCH_SIZE = 500
+    DELETE_WORKERS = 4
+    CHECKPOINT_ID_RANGE = 50000
+    EXTRACTION_WORKERS = 4
+    EXTRACTION_QUEUE_SIZE = 5000
+    SUMMARY_WORKERS = 8
+    SUMMARY_BACKFILL_CHECKPOINT_DAYS = 30
+    CALL_DATE_STAMP_RETENTION = timedelta(days=400)
+
     def __init__(self, datastore_client, config=None):
         self.datastore_client = datastore_client
         self.config = config
@@ -18,27 +43,212 @@ class CallHistoryClient:
     def delete_historical_call_history(self):
         # Uncomment this to generate test data to confirm deletion is working
         # self.__generate_year_old_test_data()
-        old_call_history_keys = self.__get_keys_for_historical_call_history_records()
-        if len(old_call_history_keys) == 0:
+        a_year_ago = datetime.now() - relativedelta(years=1)
+        number_of_deleted_records = self.__delete_datastore_records(
+            self.__iter_keys_for_historical_records(
+                "CallHistory", "call_start_time", a_year_ago
+            ),
+            "Deleted call history",
+        )
+        if number_of_deleted_records is None:
+            print("Failed to delete call history records older than a year")
+        elif number_of_deleted_records == 0:
             print("No call history records older than a year found")
-            return
-        self.__delete_datastore_records(old_call_history_keys)
-        self.__get_keys_for_historical_call_history_records()
+        else:
+            print(
+                f"Deleted {number_of_deleted_records} records with a call_start_time older than one year ({a_year_ago})"
+            )
+        number_of_deleted_summaries = self.__delete_datastore_records(
+            self.__iter_keys_for_historical_records(
+                "InterviewerDailySummary", "date", a_year_ago
+            ),
+            "Deleted interviewer daily summaries",
+        )
+        if number_of_deleted_summaries is None:
+            print("Failed to delete interviewer daily summaries older than a year")
+        elif number_of_deleted_summaries:
+            print(
+                f"Deleted {number_of_deleted_summaries} interviewer daily summaries older than one year ({a_year_ago})"
+            )
 
     def call_history_extraction_process(self):
-        call_history = self.__extract_call_history()
-        self.__upload_call_history_to_datastore(call_history)
+        status = self.get_call_history_report_status()
+        fingerprint_rows = get_cati_call_history_fingerprint_from_database(self.config)
+        fingerprint = self.generate_call_history_fingerprint(fingerprint_rows)
+        to_id = max((row["MaxId"] for row in fingerprint_rows), default=0)
+        from_id = self.get_extraction_watermark(status, to_id)
+        if (
+            from_id is not None
+            and status.get("dial_history_fingerprint") == fingerprint
+        ):
+            print("No changes to call history in the CATI database since the last run")
+        else:
+            status = self.__reconcile_call_history(
+                status, fingerprint_rows, fingerprint, from_id, to_id
+            )
+        if not status.get("daily_summaries_backfilled"):
+            self.backfill_interviewer_daily_summaries(status)
+
+    def __reconcile_call_history(
+        self, status, fingerprint_rows, fingerprint, from_id, to_id
+    ):
+        full_reconcile = from_id is None
+        if full_reconcile:
+            from_id = self.get_reconcile_checkpoint(status, to_id)
+        for chunk_from_id, chunk_to_id in self.split_into_id_ranges(
+            from_id, to_id, self.CHECKPOINT_ID_RANGE
+        ):
+            instrument_ids = self.get_instrument_ids_in_id_range(
+                fingerprint_rows, chunk_from_id, chunk_to_id
+            )
+            changed_call_dates = set()
+            for call_history in self.__extract_call_history(
+                chunk_from_id, chunk_to_id, instrument_ids
+            ):
+                new_call_history = self.__upload_call_history_to_datastore(call_history)
+                # A full reconcile re-extracts calls that are already stored, so
+                # only newly uploaded ones can change the summaries. Routine runs
+                # refresh every extracted call in case a previous run stopped
+                # between uploading calls and updating their summaries.
+                changed_call_history = (
+                    new_call_history if full_reconcile else call_history
+                )
+                self.update_interviewer_daily_summaries(changed_call_history)
+                changed_call_dates.update(
+                    record.call_start_time.date()
+                    for record in changed_call_history
+                    if isinstance(record.call_start_time, datetime)
+                )
+            print(f"Committed call history checkpoint at DialHistory Id {chunk_to_id}")
+            checkpoint = (
+                {"reconcile_checkpoint_id": chunk_to_id}
+                if full_reconcile
+                else {"last_dial_history_id": chunk_to_id}
+            )
+            if changed_call_dates:
+                checkpoint["call_dates_last_updated"] = self.stamp_call_dates(
+                    status, changed_call_dates
+                )
+            status = self.__update_call_history_report_status(status, **checkpoint)
+        if full_reconcile:
+            return self.__update_call_history_report_status(
+                status,
+                last_dial_history_id=to_id,
+                last_full_reconcile=datetime.now(timezone.utc),
+                reconcile_checkpoint_id=None,
+                dial_history_fingerprint=fingerprint,
+            )
+        return self.__update_call_history_report_status(
+            status,
+            last_dial_history_id=to_id,
+            dial_history_fingerprint=fingerprint,
+        )
+
+    def backfill_interviewer_daily_summaries(self, status):
+        # The CATI extraction only returns questionnaires that are still
+        # configured, so the summaries are backfilled from the calls stored in
+        # Datastore, one day at a time across the retention window.
+        today = datetime.now(timezone.utc).date()
+        first_day = (datetime.now(timezone.utc) - relativedelta(years=1)).date()
+        if status.get("daily_summaries_backfill_date") is not None:
+            first_day = date.fromisoformat(
+                status["daily_summaries_backfill_date"]
+            ) + timedelta(days=1)
+            print(f"Resuming the daily summaries backfill from {first_day}")
+        days = [
+            first_day + timedelta(days=offset)
+            for offset in range((today - first_day).days + 1)
+        ]
+        print(
+            f"Backfilling daily summaries from stored call history for {len(days)} days"
+        )
+        for backfill_days in self.iter_batches(
+            days, self.SUMMARY_BACKFILL_CHECKPOINT_DAYS
+        ):
+            with ThreadPoolExecutor(max_workers=self.SUMMARY_WORKERS) as executor:
+                daily_summaries = [
+                    summary
+                    for summaries in executor.map(
+                        self.get_daily_summaries_for_day, backfill_days
+                    )
+                    for summary in summaries
+                ]
+            self.put_interviewer_daily_summaries(daily_summaries)
+            status = self.__update_call_history_report_status(
+                status,
+                daily_summaries_backfill_date=backfill_days[-1].isoformat(),
+                call_dates_last_updated=self.stamp_call_dates(status, backfill_days),
+            )
+        print("Backfilled daily summaries from stored call history")
+        return self.__update_call_history_report_status(
+            status, daily_summaries_backfilled=True, daily_summaries_backfill_date=None
+        )
 
     def get_call_history_report_status(self):
         key = self.datastore_client.key("Status", "call_history")
         status = self.datastore_client.get(key)
         return status
 
-    def get_cati_call_history(self):
-        print(f"Obtaining the call history records in the CATI database")
-        results = get_cati_call_history_from_database(self.config)
-        print(f"Obtained {len(results)} call history records in the CATI database")
-        cati_call_history_list = []
+    def get_extraction_watermark(self, status, max_id):
+        if status is None or status.get("last_dial_history_id") is None:
+            print("No call history watermark found, running a full extraction")
+            return None
+        if status.get("reconcile_checkpoint_id") is not None:
+            print("Full reconcile of call history is in progress, resuming it")
+            return None
+        last_full_reconcile = status.get("last_full_reconcile")
+        if (
+            last_full_reconcile is None
+            or datetime.now(timezone.utc) - last_full_reconcile
+            > self.FULL_RECONCILE_INTERVAL
+        ):
+            print("Full reconcile of call history is due, running a full extraction")
+            return None
+        if status["last_dial_history_id"] > max_id:
+            print(
+                f"Call history watermark {status['last_dial_history_id']} is ahead of the CATI database ({max_id}), running a full extraction"
+            )
+            return None
+        return status["last_dial_history_id"]
+
+    @staticmethod
+    def generate_call_history_fingerprint(fingerprint_rows):
+        fingerprint = hashlib.sha256()
+        for row in fingerprint_rows:
+            fingerprint.update(
+                f"{row['InstrumentId']}|{row['Total']}|{row['MaxId']}|{row['MaxEndTime']};".encode()
+            )
+        return fingerprint.hexdigest()
+
+    def stamp_call_dates(self, status, call_dates):
+        call_date_stamps = dict((status or {}).get("call_dates_last_updated") or {})
+        now = datetime.now(timezone.utc)
+        for call_date in call_dates:
+            call_date_stamps[call_date.isoformat()] = now
+        oldest_call_date = (now - self.CALL_DATE_STAMP_RETENTION).date().isoformat()
+        return {
+            call_date: stamp
+            for call_date, stamp in call_date_stamps.items()
+            if call_date >= oldest_call_date
+        }
+
+    @staticmethod
+    def get_reconcile_checkpoint(status, max_id):
+        if status is None or status.get("reconcile_checkpoint_id") is None:
+            return 0
+        if status["reconcile_checkpoint_id"] > max_id:
+            return 0
+        print(
+            f"Resuming full reconcile of call history from DialHistory Id {status['reconcile_checkpoint_id']}"
+        )
+        return status["reconcile_checkpoint_id"]
+
+    def iter_cati_call_history(self, from_id=None, to_id=None, instrument_ids=None):
+        print(
+            f"Obtaining the call history records in the CATI database with an Id between '{from_id}' and '{to_id}'"
+        )
+        results = self.__iter_cati_call_history_rows(from_id, to_id, instrument_ids)
+        number_of_results = 0
         for item in results:
             cati_call_history = CallHistory(
                 questionnaire_name=item.get("InstrumentName"),
@@ -58,11 +268,9 @@ class CallHistoryClient:
             )
             if cati_call_history.questionnaire_name != "":
                 cati_call_history.generate_questionnaire_details()
-            cati_call_history_list.append(cati_call_history)
-        print(
-            f"Created {len(cati_call_history_list)} call history models for processing"
-        )
-        return cati_call_history_list
+            number_of_results += 1
+            yield cati_call_history
+        print(f"Obtained {number_of_results} call history records in the CATI database")
 
     @staticmethod
     def split_into_batches(list_to_split, batch_length):
@@ -71,6 +279,27 @@ class CallHistoryClient:
             for i in range(0, len(list_to_split), batch_length)
         ]
 
+    @staticmethod
+    def get_instrument_ids_in_id_range(fingerprint_rows, from_id, to_id):
+        return [
+            row["InstrumentId"]
+            for row in fingerprint_rows
+            if row["MaxId"] > from_id and row["MinId"] <= to_id
+        ]
+
+    @staticmethod
+    def split_into_id_ranges(from_id, to_id, range_length):
+        return [
+            (i, min(i + range_length, to_id))
+            for i in range(from_id, to_id, range_length)
+        ]
+
+    @staticmethod
+    def iter_batches(iterable, batch_length):
+        iterator = iter(iterable)
+        while batch := list(islice(iterator, batch_length)):
+            yield batch
+
     def __generate_year_old_test_data(self):
         i = 1
         while i < 601:
@@ -84,32 +313,90 @@ class CallHistoryClient:
             self.datastore_client.put(task)
             i += 1
 
-    def __delete_datastore_records(self, datastore_record_keys):
-        batches = self.split_into_batches(datastore_record_keys, 500)
+    def __delete_datastore_records(self, datastore_record_key_batches, description):
         try:
-            for batch in batches:
-                print(
-                    f"Attempting to delete batch of {len(batch)} items (Total batches {len(batches)})"
-                )
-                self.datastore_client.delete_multi(batch)
+            return process_batches_concurrently(
+                self.datastore_client.delete_multi,
+                datastore_record_key_batches,
+                description,
+                max_workers=self.DELETE_WORKERS,
+            )
         except Exception as err:
             print(f"Failed to delete records in datastore: {err}")
+            return None
 
-    def __get_keys_for_historical_call_history_records(self):
-        a_year_ago = datetime.now() - relativedelta(years=1)
+    def __iter_keys_for_historical_records(self, kind, date_field, a_year_ago):
         query = self.datastore_client.query(
-            kind="CallHistory", filters=[("call_start_time", "<=", a_year_ago)]
+            kind=kind, filters=[(date_field, "<=", a_year_ago)]
         )
         query.keys_only()
-        old_call_history_keys = list([entity.key for entity in query.fetch()])
+        # Iterating the query follows every result batch, including the short
+        # ones Datastore returns before it has finished, until none are left.
+        for old_keys in self.iter_batches(
+            (entity.key for entity in query.fetch()), self.DELETE_BATCH_SIZE
+        ):
+            print(
+                f"Found {len(old_keys)} {kind} records with a {date_field} older than one year ({a_year_ago})"
+            )
+            yield old_keys
+
+    def __extract_call_history(self, from_id, to_id, instrument_ids=None):
+        print("Getting call history data")
+        return self.iter_batches(
+            self.iter_cati_call_history(from_id, to_id, instrument_ids),
+            self.EXTRACTION_BATCH_SIZE,
+        )
+
+    def __iter_cati_call_history_rows(self, from_id, to_id, instrument_ids):
+        if instrument_ids is None:
+            yield from get_cati_call_history_from_database(self.config, from_id, to_id)
+            return
         print(
-            f"Found {len(old_call_history_keys)} records with a call_start_time older than one year ({a_year_ago})"
+            f"Extracting call history for {len(instrument_ids)} instruments using {self.EXTRACTION_WORKERS} workers"
         )
-        return old_call_history_keys
+        # Workers hand rows over through a bounded queue, so at most
+        # EXTRACTION_QUEUE_SIZE rows plus one fetch chunk per worker are held in
+        # memory however large the Id range is.
+        rows: queue.Queue = queue.Queue(maxsize=self.EXTRACTION_QUEUE_SIZE)
+        stopped = threading.Event()
+        partition_finished = object()
 
-    def __extract_call_history(self):
-        print("Getting call history data")
-        return self.get_cati_call_history()
+        def hand_over(item):
+            while not stopped.is_set():
+                try:
+                    rows.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def extract_partition(instrument_id):
+            try:
+                for row in get_cati_call_history_from_database(
+                    self.config, from_id, to_id, instrument_id
+                ):
+                    if not hand_over(row):
+                        return
+            except Exception as err:
+                hand_over(err)
+                return
+            hand_over(partition_finished)
+
+        with ThreadPoolExecutor(max_workers=self.EXTRACTION_WORKERS) as executor:
+            for instrument_id in instrument_ids:
+                executor.submit(extract_partition, instrument_id)
+            try:
+                remaining_partitions = len(instrument_ids)
+                while remaining_partitions:
+                    row = rows.get()
+                    if row is partition_finished:
+                        remaining_partitions -= 1
+                    elif isinstance(row, Exception):
+                        raise row
+                    else:
+                        yield row
+            finally:
+                stopped.set()
 
     def __upload_call_history_to_datastore(self, call_history_data):
         print("Checking for new call history records to upload to datastore")
@@ -123,10 +410,86 @@ class CallHistoryClient:
             print(
                 f"Uploaded {len(new_call_history_records)} new call history records to datastore"
             )
-        self.__update_call_history_report_status()
+        return new_call_history_records
+
+    def update_interviewer_daily_summaries(self, call_history_data):
+        interviewer_days = sorted(
+            {
+                (record.interviewer, record.call_start_time.date())
+                for record in call_history_data
+                if record.interviewer and isinstance(record.call_start_time, datetime)
+            }
+        )
+        if len(interviewer_days) == 0:
+            return
+        print(
+            f"Rebuilding daily summaries for {len(interviewer_days)} interviewer days using {self.SUMMARY_WORKERS} workers"
+        )
+        with ThreadPoolExecutor(max_workers=self.SUMMARY_WORKERS) as executor:
+            daily_summaries = [
+                summary
+                for summaries in executor.map(
+                    lambda interviewer_day: self.get_interviewer_daily_summaries(
+                        *interviewer_day
+                    ),
+                    interviewer_days,
+                )
+                for summary in summaries
+            ]
+        self.put_interviewer_daily_summaries(daily_summaries)
+
+    def put_interviewer_daily_summaries(self, daily_summaries):
+        datastore_tasks = []
+        for summary in daily_summaries:
+            task = datastore.Entity(
+                self.datastore_client.key(
+                    "InterviewerDailySummary", summary.datastore_key_name()
+                ),
+                exclude_from_indexes=("status_counts", "no_contact_call_results"),
+            )
+            task.update(summary.to_entity_dict())
+            datastore_tasks.append(task)
+        process_batches_concurrently(
+            self.datastore_client.put_multi,
+            self.split_into_batches(datastore_tasks, 500),
+            "Updated interviewer daily summaries",
+            max_workers=self.UPLOAD_WORKERS,
+        )
+
+    def get_interviewer_daily_summaries(self, interviewer, date):
+        # Summaries are rebuilt from the stored calls rather than incremented,
+        # so re-running an interrupted extraction cannot count a call twice.
+        query = self.datastore_client.query(kind="CallHistory")
+        query.add_filter("interviewer", "=", interviewer)
+        return self.summarise_calls_on_day(query, date)
+
+    def get_daily_summaries_for_day(self, date):
+        return self.summarise_calls_on_day(
+            self.datastore_client.query(kind="CallHistory"), date
+        )
+
+    @staticmethod
+    def summarise_calls_on_day(query, date):
+        day_start = datetime.combine(date, time.min)
+        query.add_filter("call_start_time", ">=", day_start)
+        query.add_filter("call_start_time", "<", day_start + timedelta(days=1))
+        records = (
+            record
+            for entity in query.fetch()
+            for record in identify_invalid_phone_number_cases(
+                identify_webnudge_cases([entity])
+            )
+        )
+        return [
+            summary
+            for summary in InterviewerDailySummary.from_call_history_records(records)
+            if summary.date is not None
+        ]
 
     def filter_out_existing_call_history_records(self, call_history_data):
-        current_call_history_in_datastore = self.get_call_history_keys()
+        current_call_history_in_datastore = self.get_call_history_keys(
+            call_history_data
+        )
 
         return list(
             filter(
@@ -137,45 +500,62 @@ class CallHistoryClient:
             )
         )
 
-    def get_call_history_keys(self):
-        query = self.datastore_client.query(kind="CallHistory")
-        query.keys_only()
-        current_call_history = {entity.key.id_or_name: None for entity in query.fetch()}
+    def get_call_history_keys(self, call_history_data):
+        candidate_keys = [
+            self.datastore_client.key(
+                "CallHistory", call_history_record.datastore_key_name()
+            )
+            for call_history_record in call_history_data
+        ]
+        current_call_history = {}
+        for batch in self.split_into_batches(candidate_keys, self.LOOKUP_BATCH_SIZE):
+            for entity in self.datastore_client.get_multi(batch):
+                current_call_history[entity.key.id_or_name] = None
+        print(
+            f"Found {len(current_call_history)} of {len(candidate_keys)} extracted call history records already in datastore"
+        )
         return current_call_history
 
     def __bulk_upload_call_history(self, new_call_history_entries):
-        client = datastore.Client()
         datastore_tasks = []
         for call_history_record in new_call_history_entries:
             task1 = datastore.Entity(
-                client.key(
-                    "CallHistory",
-                    f"{call_history_record.call_number}-{call_history_record.dial_number}-{call_history_record.busy_dials}-{call_history_record.questionnaire_name}-{call_history_record.serial_number}-{call_history_record.call_start_time}",
+                self.datastore_client.key(
+                    "CallHistory", call_history_record.datastore_key_name()
                 )
             )
-            task1.update(asdict(call_history_record))
+            task1.update(call_history_record.to_entity_dict())
             datastore_tasks.append(task1)
         datastore_batches = self.split_into_batches(datastore_tasks, 500)
 
-        for batch in datastore_batches:
-            client.put_multi(batch)
+        process_batches_concurrently(
+            self.datastore_client.put_multi,
+            datastore_batches,
+            "Uploaded call history",
+            max_workers=self.UPLOAD_WORKERS,
+        )
 
-    def __update_call_history_report_status(self):
+    def __update_call_history_report_status(self, status, **status_fields):
         complete_key = self.datastore_client.key("Status", "call_history")
-        task = datastore.Entity(key=complete_key)
+        task = datastore.Entity(
+            key=complete_key, exclude_from_indexes=("call_dates_last_updated",)
+        )
+        if status is not None:
+            task.update(status)
         task.update(
             {
                 "last_updated": datetime.utcnow(),
+                **status_fields,
             }
         )
         self.datastore_client.put(task)
-        return
+        return task
 
     @staticmethod
     def __check_if_call_history_record_already_exists(
         call_history_record, current_call_history_in_datastore
     ):
         return (
-            f"{call_history_record.call_number}-{call_history_record.dial_number}-{call_history_record.busy_dials}-{call_history_record.questionnaire_name}-{call_history_record.serial_number}-{call_history_record.call_start_time}"
+            call_history_record.datastore_key_name()
             in current_call_history_in_datastore
         )
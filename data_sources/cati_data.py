@@ -8,12 +8,20 @@ from models.call_history_model import CatiCallHistoryTable
 from models.mi_hub_call_history_model import CatiMiHubCallHistoryTable
 
 
-def get_cati_call_history_from_database(config):
-    return CatiCallHistoryTable.get_cati_history_records(config)
+def get_cati_call_history_from_database(
+    config, from_id=None, to_id=None, instrument_id=None
+):
+    return CatiCallHistoryTable.iter_cati_history_records(
+        config, from_id, to_id, instrument_id
+    )
+
+
+def get_cati_call_history_fingerprint_from_database(config):
+    return CatiCallHistoryTable.get_fingerprint(config)
 
 
 def get_cati_mi_hub_call_history_from_database(config):
-    return CatiMiHubCallHistoryTable.select_from(config)
+    return CatiMiHubCallHistoryTable.stream_from(config)
 
 
 def get_cati_appointment_resource_planning_from_database(
@@ -0,0 +1,58 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class VersionedLRUCache:
+    def __init__(self, max_size, ttl_seconds, max_weight=None, weigh=len):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.max_weight = max_weight
+        self.weigh = weigh
+        self._entries: OrderedDict = OrderedDict()
+        self._weight = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, entry_version, expires_at, _ = entry
+            if entry_version != version or expires_at < time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, version):
+        # Without a max_weight the cache is bounded by entry count alone. With
+        # one, values heavier than the whole budget are not cached at all.
+        weight = self.weigh(value) if self.max_weight is not None else 0
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if self.max_weight is not None and weight > self.max_weight:
+                return
+            self._entries[key] = (
+                value,
+                version,
+                time.monotonic() + self.ttl_seconds,
+                weight,
+            )
+            self._weight += weight
+            while len(self._entries) > self.max_size or (
+                self.max_weight is not None and self._weight > self.max_weight
+            ):
+                self._remove(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._weight = 0
+
+    def _remove(self, key):
+        self._weight -= self._entries.pop(key)[3]
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,72 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from google.api_core import exceptions
+
+RETRYABLE_EXCEPTIONS = (
+    exceptions.Aborted,
+    exceptions.DeadlineExceeded,
+    exceptions.InternalServerError,
+    exceptions.ServiceUnavailable,
+    exceptions.TooManyRequests,
+)
+
+
+def process_batches_concurrently(
+    operation,
+    batches,
+    description,
+    max_workers=4,
+    max_retries=3,
+    backoff_seconds=1.0,
+):
+    processed = 0
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = set()
+        for batch_number, batch in enumerate(batches, start=1):
+            if len(pending) >= max_workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                processed += sum(future.result() for future in done)
+            pending.add(
+                executor.submit(
+                    process_batch_with_retry,
+                    operation,
+                    batch,
+                    f"{description} batch {batch_number}",
+                    max_retries,
+                    backoff_seconds,
+                )
+            )
+        processed += sum(future.result() for future in pending)
+    elapsed = time.monotonic() - started
+    print(
+        f"{description} {processed} entities in {elapsed:.2f}s ({processed / max(elapsed, 0.001):.0f} entities/s)"
+    )
+    return processed
+
+
+def process_batch_with_retry(
+    operation, batch, description, max_retries=3, backoff_seconds=1.0
+):
+    attempt = 0
+    while True:
+        started = time.monotonic()
+        try:
+            operation(batch)
+        except RETRYABLE_EXCEPTIONS as err:
+            attempt += 1
+            if attempt > max_retries:
+                print(f"{description} failed after {max_retries} retries: {err}")
+                raise
+            wait_seconds = backoff_seconds * 2 ** (attempt - 1)
+            print(
+                f"{description} failed: {err}. Retrying in {wait_seconds}s (attempt {attempt} of {max_retries})"
+            )
+            time.sleep(wait_seconds)
+            continue
+        elapsed = time.monotonic() - started
+        print(
+            f"{description}: {len(batch)} entities in {elapsed:.2f}s ({len(batch) / max(elapsed, 0.001):.0f} entities/s)"
+        )
+        return len(batch)
@@ -1,12 +1,65 @@
-from google.cloud import datastore
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 
+from google.api_core import exceptions
+
+from functions.cache_functions import VersionedLRUCache
 from functions.date_functions import parse_date_string_to_datetime
+from functions.google_client_functions import get_datastore_client
 from models.error_capture import BertException
+from models.interviewer_daily_summary_model import InterviewerDailySummary
+
+CALL_HISTORY_CACHE_MAX_RECORDS = 20000
+CALL_HISTORY_CACHE_MAX_UNPROJECTED_RANGE = timedelta(days=7)
+call_history_records_cache = VersionedLRUCache(
+    max_size=256, ttl_seconds=900, max_weight=CALL_HISTORY_CACHE_MAX_RECORDS
+)
+QUESTIONNAIRE_QUERY_WORKERS = 8
+timestamp_fields = ["call_start_time", "call_end_time"]
+
+
+def get_questionnaires(interviewer, start_date_string, end_date_string, survey_tla):
+    start_date, end_date = parse_dates(start_date_string, end_date_string)
+    if is_invalid(start_date) or is_invalid(end_date):
+        raise BertException("Invalid date range parameters provided", 400)
 
+    cache_key = ("questionnaires", interviewer, start_date, end_date, survey_tla)
+    status = get_call_history_status()
+    last_updated = get_call_history_last_updated(status)
+    if last_updated is not None:
+        questionnaires = call_history_records_cache.get(cache_key, last_updated)
+        if questionnaires is not None:
+            return list(questionnaires)
 
-def get_questionnaires(interviewer, start_date, end_date, survey_tla):
-    records = get_call_history_records(interviewer, start_date, end_date, survey_tla)
-    return list(set([record["questionnaire_name"] for record in records]))
+    # Only the names are needed, so read them from the index with a projection
+    # query, preferring the much smaller daily summaries once they are complete.
+    if daily_summaries_are_available(status):
+        kind, date_field = "InterviewerDailySummary", "date"
+    else:
+        kind, date_field = "CallHistory", "call_start_time"
+    questionnaires = get_questionnaire_names(
+        kind, date_field, interviewer, start_date, end_date, survey_tla
+    )
+    if last_updated is not None:
+        call_history_records_cache.set(cache_key, questionnaires, last_updated)
+    return list(questionnaires)
+
+
+def get_questionnaire_names(
+    kind, date_field, interviewer_name, start_date, end_date, survey_tla
+):
+    print(
+        f"Getting questionnaire names from {kind} for interviewer '{interviewer_name}' between '{start_date}' and '{end_date}'"
+    )
+    query = get_datastore_client().query(kind=kind)
+    query.add_filter("interviewer", "=", interviewer_name)
+    query.add_filter(date_field, ">=", start_date)
+    query.add_filter(date_field, "<=", end_date)
+    if survey_tla is not None:
+        query.add_filter("survey", "=", survey_tla)
+    query.projection = ["questionnaire_name"]
+    return set(entity["questionnaire_name"] for entity in query.fetch())
 
 
 def get_call_history_records(
@@ -15,38 +68,198 @@ def get_call_history_records(
     end_date_string,
     survey_tla=None,
     questionnaires=None,
+    projection=None,
+    status=None,
 ):
     start_date, end_date = parse_dates(start_date_string, end_date_string)
     if is_invalid(start_date) or is_invalid(end_date):
         raise BertException("Invalid date range parameters provided", 400)
+
+    cache_key = (
+        interviewer_name,
+        start_date,
+        end_date,
+        survey_tla,
+        tuple(questionnaires) if questionnaires is not None else None,
+        tuple(projection) if projection is not None else None,
+    )
+    if status is None:
+        status = get_call_history_status()
+    last_updated = get_call_history_last_updated(status)
+    # Whole entities are only cached for short ranges, as a wide unprojected
+    # range would fill the cache with fields no report reads.
+    use_cache = last_updated is not None and (
+        projection is not None
+        or end_date - start_date <= CALL_HISTORY_CACHE_MAX_UNPROJECTED_RANGE
+    )
+    if use_cache:
+        results = call_history_records_cache.get(cache_key, last_updated)
+        if results is not None:
+            print(
+                f"Using cached call history data for interviewer '{interviewer_name}' between '{start_date}' and '{end_date}'"
+            )
+            return list(results)
+
     records = get_datastore_records(
-        interviewer_name, start_date, end_date, survey_tla, questionnaires
+        interviewer_name, start_date, end_date, survey_tla, questionnaires, projection
     )
     results = identify_webnudge_cases(records)
     results = identify_invalid_phone_number_cases(results)
-    return results
+    if use_cache:
+        call_history_records_cache.set(cache_key, results, last_updated)
+    return list(results)
+
+
+def get_call_history_status():
+    # A missing status entity reads as empty, so that reports can pass the
+    # status they have already read down to the functions they call.
+    client = get_datastore_client()
+    return client.get(client.key("Status", "call_history")) or {}
+
+
+def get_call_history_last_updated(status):
+    return status.get("last_updated")
+
+
+def get_call_history_day_versions(status):
+    if status.get("last_updated") is None:
+        return None
+    return dict(status.get("call_dates_last_updated") or {})
+
+
+def daily_summaries_are_available(status):
+    return bool(status.get("daily_summaries_backfilled"))
+
+
+def get_interviewer_daily_summaries(
+    interviewer_name,
+    start_date_string,
+    end_date_string,
+    survey_tla=None,
+    questionnaires=None,
+    status=None,
+):
+    start_date, end_date = parse_dates(start_date_string, end_date_string)
+    if is_invalid(start_date) or is_invalid(end_date):
+        raise BertException("Invalid date range parameters provided", 400)
+    if status is None:
+        status = get_call_history_status()
+    if not daily_summaries_are_available(status):
+        return None
+
+    print(
+        f"Getting daily summaries for interviewer '{interviewer_name}' between '{start_date}' and '{end_date}'"
+    )
+    query = get_datastore_client().query(kind="InterviewerDailySummary")
+    query.add_filter("interviewer", "=", interviewer_name)
+    query.add_filter("date", ">=", start_date)
+    query.add_filter("date", "<=", end_date)
+    if survey_tla is not None:
+        query.add_filter("survey", "=", survey_tla)
+    summaries = [
+        InterviewerDailySummary.from_entity(entity) for entity in query.fetch()
+    ]
+    if questionnaires is not None:
+        summaries = [
+            summary
+            for summary in summaries
+            if summary.questionnaire_name in questionnaires
+        ]
+    print(f"get_interviewer_daily_summaries - {len(summaries)} daily summaries found")
+    return summaries
 
 
 def get_datastore_records(
-    interviewer_name, start_date, end_date, survey_tla, questionnaires
+    interviewer_name, start_date, end_date, survey_tla, questionnaires, projection=None
 ):
-    client = datastore.Client()
+    client = get_datastore_client()
 
     if questionnaires is None:
         return get_datastore_records_for_questionnaire(
-            client, interviewer_name, start_date, survey_tla, end_date, None
+            client, interviewer_name, start_date, survey_tla, end_date, None, projection
         )
 
-    records = []
-    for questionnaire in questionnaires:
-        records += get_datastore_records_for_questionnaire(
-            client, interviewer_name, start_date, survey_tla, end_date, questionnaire
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(len(questionnaires), QUESTIONNAIRE_QUERY_WORKERS))
+    ) as executor:
+        records_per_questionnaire = list(
+            executor.map(
+                lambda questionnaire: get_datastore_records_for_questionnaire(
+                    client,
+                    interviewer_name,
+                    start_date,
+                    survey_tla,
+                    end_date,
+                    questionnaire,
+                    projection,
+                ),
+                questionnaires,
+            )
+        )
+    return list(
+        heapq.merge(
+            *records_per_questionnaire, key=lambda record: record["call_start_time"]
         )
-    return sorted(records, key=lambda record: record["call_start_time"])
+    )
 
 
 def get_datastore_records_for_questionnaire(
-    client, interviewer_name, start_date, survey_tla, end_date, questionnaire
+    client,
+    interviewer_name,
+    start_date,
+    survey_tla,
+    end_date,
+    questionnaire,
+    projection=None,
+):
+    query = build_call_history_query(
+        client,
+        interviewer_name,
+        start_date,
+        end_date,
+        survey_tla,
+        [questionnaire] if questionnaire is not None else None,
+    )
+
+    if projection is not None:
+        query.projection = projection
+
+    records = list(query.fetch())
+    if projection is not None:
+        records = convert_projected_timestamps(records)
+    print(
+        f"get_call_history_records_by_interviewer_and_date_range - {len(records)} records found"
+    )
+    return records
+
+
+def get_team_call_history_records(
+    start_date_string, end_date_string, survey_tla, projection=None
+):
+    start_date, end_date = parse_dates(start_date_string, end_date_string)
+    if is_invalid(start_date) or is_invalid(end_date):
+        raise BertException("Invalid date range parameters provided", 400)
+
+    print(
+        f"Getting call history data for survey '{survey_tla}' between '{start_date}' and '{end_date}'"
+    )
+    query = get_datastore_client().query(kind="CallHistory")
+    query.add_filter("survey", "=", survey_tla)
+    query.add_filter("call_start_time", ">=", start_date)
+    query.add_filter("call_start_time", "<=", end_date)
+    if projection is not None:
+        query.projection = projection
+
+    records = list(query.fetch())
+    if projection is not None:
+        records = convert_projected_timestamps(records)
+    print(f"get_team_call_history_records - {len(records)} records found")
+    records = identify_webnudge_cases(records)
+    return identify_invalid_phone_number_cases(records)
+
+
+def build_call_history_query(
+    client, interviewer_name, start_date, end_date, survey_tla, questionnaires
 ):
     print(
         f"Getting call history data for interviewer '{interviewer_name}' between '{start_date}' and '{end_date}'"
@@ -60,14 +273,99 @@ def get_datastore_records_for_questionnaire(
         print(f"Filtering call history data by survey '{survey_tla}'")
         query.add_filter("survey", "=", survey_tla)
 
-    if questionnaire is not None:
-        print(f"Filtering call history data by instrument '{questionnaire}'")
-        query.add_filter("questionnaire_name", "=", questionnaire)
+    if questionnaires is not None and len(questionnaires) == 1:
+        print(f"Filtering call history data by instrument '{questionnaires[0]}'")
+        query.add_filter("questionnaire_name", "=", questionnaires[0])
+    elif questionnaires is not None:
+        print(f"Filtering call history data by instruments {questionnaires}")
+        query.add_filter("questionnaire_name", "IN", questionnaires)
 
-    records = list(query.fetch())
+    query.order = ["call_start_time"]
+    return query
+
+
+def get_call_history_records_page(
+    interviewer_name,
+    start_date_string,
+    end_date_string,
+    survey_tla=None,
+    questionnaires=None,
+    page_size=500,
+    cursor=None,
+):
+    start_date, end_date = parse_dates(start_date_string, end_date_string)
+    if is_invalid(start_date) or is_invalid(end_date):
+        raise BertException("Invalid date range parameters provided", 400)
+
+    query = build_call_history_query(
+        get_datastore_client(),
+        interviewer_name,
+        start_date,
+        end_date,
+        survey_tla,
+        questionnaires,
+    )
+    try:
+        # Iterating follows every result batch up to the limit, as Datastore can
+        # return short batches before it has finished. The next page token is
+        # only None once there are no more results.
+        query_iterator = query.fetch(start_cursor=cursor, limit=page_size)
+        records = list(query_iterator)
+    except (ValueError, exceptions.BadRequest) as err:
+        print(f"Failed to get call history page for cursor '{cursor}': {err}")
+        raise BertException("Invalid request, cursor is not valid", 400)
+
+    next_cursor = query_iterator.next_page_token
     print(
-        f"get_call_history_records_by_interviewer_and_date_range - {len(records)} records found"
+        f"get_call_history_records_page - {len(records)} records found, more results: {next_cursor is not None}"
+    )
+    records = identify_webnudge_cases(records)
+    records = identify_invalid_phone_number_cases(records)
+    if isinstance(next_cursor, bytes):
+        next_cursor = next_cursor.decode("ascii")
+    return records, next_cursor
+
+
+def iter_call_history_records(
+    interviewer_name,
+    start_date_string,
+    end_date_string,
+    survey_tla=None,
+    questionnaires=None,
+):
+    start_date, end_date = parse_dates(start_date_string, end_date_string)
+    if is_invalid(start_date) or is_invalid(end_date):
+        raise BertException("Invalid date range parameters provided", 400)
+
+    # The query is built before returning so that invalid parameters are raised
+    # to the caller rather than part way through a streamed response.
+    query = build_call_history_query(
+        get_datastore_client(),
+        interviewer_name,
+        start_date,
+        end_date,
+        survey_tla,
+        questionnaires,
     )
+
+    def stream_records():
+        for record in query.fetch():
+            yield from identify_invalid_phone_number_cases(
+                identify_webnudge_cases([record])
+            )
+
+    return stream_records()
+
+
+def convert_projected_timestamps(records):
+    # Projection queries read values from the index, where timestamps are stored
+    # as microseconds since the epoch.
+    for record in records:
+        for field in timestamp_fields:
+            if isinstance(record.get(field), int):
+                record[field] = datetime.fromtimestamp(
+                    record[field] / 1_000_000, tz=timezone.utc
+                )
     return records
 
 
@@ -0,0 +1,41 @@
+import threading
+
+from google.cloud import datastore, storage, tasks_v2  # type: ignore
+
+_clients: dict = {}
+_clients_lock = threading.RLock()
+
+
+def get_datastore_client():
+    return _get_or_create_client("datastore", datastore.Client)
+
+
+def get_storage_client():
+    return _get_or_create_client("storage", storage.Client)
+
+
+def get_cloud_tasks_client():
+    return _get_or_create_client("cloud_tasks", tasks_v2.CloudTasksClient)
+
+
+def get_storage_bucket(bucket_name):
+    return _get_or_create_client(
+        f"storage_bucket/{bucket_name}",
+        lambda: get_storage_client().get_bucket(bucket_name),
+    )
+
+
+def clear_clients():
+    with _clients_lock:
+        _clients.clear()
+
+
+def _get_or_create_client(name, create_client):
+    client = _clients.get(name)
+    if client is not None:
+        return client
+    with _clients_lock:
+        if name not in _clients:
+            print(f"Creating {name} client")
+            _clients[name] = create_client()
+        return _clients[name]
@@ -1,5 +1,7 @@
 from google.cloud import storage  # type: ignore
 
+from functions.google_client_functions import get_storage_bucket, get_storage_client
+
 # workaround to prevent file transfer timeouts
 storage.blob._DEFAULT_CHUNKSIZE = 5 * 1024 * 1024  # 5 MB
 storage.blob._MAX_MULTIPART_SIZE = 5 * 1024 * 1024  # 5 MB
@@ -15,9 +17,8 @@ class GoogleStorage:
     def initialise_bucket_connection(self):
         try:
             print(f"Connecting to bucket - {self.nifi_staging_bucket}")
-            storage_client = storage.Client()
-            self.storage_client = storage_client
-            self.bucket = storage_client.get_bucket(self.nifi_staging_bucket)
+            self.storage_client = get_storage_client()
+            self.bucket = get_storage_bucket(self.nifi_staging_bucket)
             print(f"Connected to bucket - {self.nifi_staging_bucket}")
         except Exception as ex:
             print("Connection to bucket failed - %s", ex)
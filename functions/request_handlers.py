@@ -5,6 +5,10 @@ from models.error_capture import BertException
 
 logging.basicConfig(format="%(levelname)s: %(message)s", level=logging.DEBUG)
 
+MAX_PAGE_SIZE = 1000
+RESPONSE_FORMATS = ["json", "ndjson"]
+INCLUDE_OPTIONS = ["call-pattern"]
+
 
 def date_handler(request):
     start_date = request.args.get("start-date", None)
@@ -46,3 +50,71 @@ def questionnaire_handler(request):
         return questionnaire.split(",")
     else:
         return None
+
+
+def interviewers_handler(request):
+    interviewers = request.args.get("interviewers", None)
+
+    if interviewers is not None:
+        return interviewers.split(",")
+    else:
+        return None
+
+
+def page_size_handler(request):
+    page_size = request.args.get("page-size", None)
+
+    if page_size is None:
+        return None
+
+    if not page_size.isdigit() or not 1 <= int(page_size) <= MAX_PAGE_SIZE:
+        raise (
+            BertException(
+                f"Invalid request, page-size must be a number between 1 and {MAX_PAGE_SIZE}",
+                400,
+            )
+        )
+
+    return int(page_size)
+
+
+def cursor_handler(request):
+    cursor = request.args.get("cursor", None)
+
+    if cursor is None or cursor == "":
+        return None
+
+    return cursor
+
+
+def response_format_handler(request):
+    response_format = request.args.get("format", "json").lower()
+
+    if response_format not in RESPONSE_FORMATS:
+        raise (
+            BertException(
+                f"Invalid request, format must be one of {', '.join(RESPONSE_FORMATS)}",
+                400,
+            )
+        )
+
+    return response_format
+
+
+def include_handler(request):
+    include = request.args.get("include", None)
+
+    if include is None or include == "":
+        return []
+
+    includes = include.split(",")
+    for option in includes:
+        if option not in INCLUDE_OPTIONS:
+            raise (
+                BertException(
+                    f"Invalid request, include must be one of {', '.join(INCLUDE_OPTIONS)}",
+                    400,
+                )
+            )
+
+    return includes
@@ -4,7 +4,7 @@ import uuid
 
 import flask
 from dotenv import load_dotenv
-from google.cloud import datastore, tasks_v2
+from google.cloud import tasks_v2
 
 from app.app import app, load_config, setup_app
 from cloud_functions.deliver_mi_hub_reports import (
@@ -12,12 +12,16 @@ from cloud_functions.deliver_mi_hub_reports import (
 )
 from data_sources.call_history_data import CallHistoryClient
 from data_sources.questionnaire_data import get_list_of_installed_questionnaires
+from functions.google_client_functions import (
+    get_cloud_tasks_client,
+    get_datastore_client,
+)
 from models.config_model import Config
 
 
 def delete_old_call_history(_request: flask.Request):
     print("Running Cloud Function - delete_old_call_history")
-    datastore_client = datastore.Client()
+    datastore_client = get_datastore_client()
     call_history_client = CallHistoryClient(datastore_client)
     call_history_client.delete_historical_call_history()
     return "Done"
@@ -27,7 +31,7 @@ def upload_call_history(_request: flask.Request):
     print("Running Cloud Function - upload_call_history")
     config = Config.from_env()
     config.log()
-    datastore_client = datastore.Client()
+    datastore_client = get_datastore_client()
     call_history_client = CallHistoryClient(datastore_client, config)
     call_history_client.call_history_extraction_process()
     return "Done"
@@ -38,7 +42,7 @@ def deliver_mi_hub_reports_trigger(_request: flask.Request):
     config = Config.from_env()
     config.log()
     installed_questionnaire_list = get_list_of_installed_questionnaires(config)
-    task_client = tasks_v2.CloudTasksClient()
+    task_client = get_cloud_tasks_client()
     for questionnaire in installed_questionnaire_list:
         print(
             f"Sending request to deliver_mi_hub_reports_processor for {questionnaire.get('name')} {questionnaire.get('id')}"
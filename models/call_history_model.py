@@ -1,12 +1,23 @@
 import datetime
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
+from functools import lru_cache
 from typing import Optional
 
 from models.database_base_model import DatabaseBase
 from models.questionnaire_configuration_model import QuestionnaireConfigurationTable
 
 
-@dataclass
+@lru_cache(maxsize=1024)
+def parse_questionnaire_details(
+    questionnaire_name: str,
+) -> tuple[str, Optional[int], Optional[str]]:
+    survey = questionnaire_name[0:3]
+    if survey == "LMS" and questionnaire_name[-1:].isnumeric():
+        return survey, int(questionnaire_name[-1:]), questionnaire_name[-3:-1]
+    return survey, None, None
+
+
+@dataclass(slots=True)
 class CallHistory:
     serial_number: int
     call_number: str
@@ -28,10 +39,23 @@ class CallHistory:
     outcome_code: Optional[int] = None
 
     def generate_questionnaire_details(self):
-        self.survey = self.questionnaire_name[0:3]
-        if self.survey == "LMS" and self.questionnaire_name[-1:].isnumeric():
-            self.wave = int(self.questionnaire_name[-1:])
-            self.cohort = self.questionnaire_name[-3:-1]
+        self.survey, wave, cohort = parse_questionnaire_details(self.questionnaire_name)
+        if wave is not None:
+            self.wave = wave
+            self.cohort = cohort
+
+    def datastore_key_name(self):
+        return f"{self.call_number}-{self.dial_number}-{self.busy_dials}-{self.questionnaire_name}-{self.serial_number}-{self.call_start_time}"
+
+    def to_entity_dict(self):
+        return {field: getattr(self, field) for field in CALL_HISTORY_FIELDS}
+
+    @classmethod
+    def fields(cls):
+        return [field.name for field in fields(cls)]
+
+
+CALL_HISTORY_FIELDS = tuple(CallHistory.fields())
 
 
 @dataclass
@@ -66,13 +90,44 @@ class CatiCallHistoryTable(DatabaseBase):
         return [cls.dial_secs(), cls.get_outcome_code()]
 
     @classmethod
-    def get_cati_history_records(cls, config):
+    def get_fingerprint(cls, config):
+        return cls.query(
+            config,
+            f"""
+            SELECT InstrumentId, COUNT(*) AS Total, MIN(Id) AS MinId, MAX(Id) AS MaxId, MAX(EndTime) AS MaxEndTime
+            FROM {cls.table_name()}
+            GROUP BY InstrumentId
+            ORDER BY InstrumentId
+            """,
+        )
+
+    @classmethod
+    def iter_cati_history_records(
+        cls, config, from_id=None, to_id=None, instrument_id=None
+    ):
+        query, params = cls.cati_history_records_query(from_id, to_id, instrument_id)
+        return cls.iter_query(config, query, params)
+
+    @classmethod
+    def cati_history_records_query(cls, from_id=None, to_id=None, instrument_id=None):
+        conditions = []
+        params = []
+        if from_id is not None:
+            conditions.append("DH.Id > %s")
+            params.append(from_id)
+        if to_id is not None:
+            conditions.append("DH.Id <= %s")
+            params.append(to_id)
+        if instrument_id is not None:
+            conditions.append("DH.InstrumentId = %s")
+            params.append(instrument_id)
+        where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
         query = f"""
             SELECT {cls.fields()}
             FROM {cls.table_name()} DH
                 JOIN {QuestionnaireConfigurationTable.table_name()} CF
                 ON DH.InstrumentId = CF.InstrumentId
+            {where_clause}
         """
-        cati_history_records = cls.query(config, query)
-
-        return cati_history_records
+        return query, params or None
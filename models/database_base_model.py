@@ -1,25 +1,87 @@
 import abc
+import hashlib
+import threading
 from abc import ABC
 from dataclasses import dataclass, fields
 
 import mysql.connector
+import mysql.connector.pooling
+
+_connection_pools: dict = {}
+_connection_pool_sizes: dict = {}
+_connection_pools_lock = threading.Lock()
 
 
 class DatabaseBase(ABC):
+    STREAM_CHUNK_SIZE = 1000
+    POOL_SIZE = 5
+
     @classmethod
     def connect_to_database(cls, config):
         try:
-            return mysql.connector.connect(
-                host=config.mysql_host,
-                user=config.mysql_user,
-                password=config.mysql_password,
-                database=config.mysql_database,
-            )
+            try:
+                # Pooled connections are pinged on checkout and reconnected if stale,
+                # and are returned to the pool rather than closed by db.close().
+                return cls.get_pooled_connection(config)
+            except mysql.connector.errors.PoolError:
+                print("MySQL connection pool exhausted, opening an unpooled connection")
+                return mysql.connector.connect(**cls.connection_settings(config))
         except mysql.connector.errors.ProgrammingError:
             print("MySQL authentication issue")
         except mysql.connector.errors.InterfaceError:
             print("MySQL connection issue")
 
+    @classmethod
+    def get_pooled_connection(cls, config):
+        pool_key = cls.get_pool_key(config)
+        pool = cls.get_connection_pool(config)
+        try:
+            return pool.get_connection()
+        except mysql.connector.errors.PoolError:
+            # Connections are opened as they are needed rather than all at once
+            # when the pool is created, so a cold Cloud Function that runs one
+            # query at a time makes one connection instead of POOL_SIZE.
+            with _connection_pools_lock:
+                if _connection_pool_sizes.get(pool_key, 0) >= cls.POOL_SIZE:
+                    raise
+                pool.add_connection()
+                _connection_pool_sizes[pool_key] = (
+                    _connection_pool_sizes.get(pool_key, 0) + 1
+                )
+            return pool.get_connection()
+
+    @classmethod
+    def get_connection_pool(cls, config):
+        pool_key = cls.get_pool_key(config)
+        with _connection_pools_lock:
+            if pool_key not in _connection_pools:
+                pool_name = hashlib.sha256(repr(pool_key).encode()).hexdigest()[:16]
+                print(f"Creating MySQL connection pool of size {cls.POOL_SIZE}")
+                # Passing the connection settings to the constructor would open
+                # every connection up front, so they are set separately.
+                pool = mysql.connector.pooling.MySQLConnectionPool(
+                    pool_name=f"bert-{pool_name}",
+                    pool_size=cls.POOL_SIZE,
+                    pool_reset_session=True,
+                )
+                pool.set_config(**cls.connection_settings(config))
+                _connection_pools[pool_key] = pool
+                _connection_pool_sizes[pool_key] = 0
+            return _connection_pools[pool_key]
+
+    @classmethod
+    def get_pool_key(cls, config):
+        return tuple(cls.connection_settings(config).values())
+
+    @staticmethod
+    def connection_settings(config):
+        return {
+            "host": config.mysql_host,
+            "user": config.mysql_user,
+            "password": config.mysql_password,
+            "database": config.mysql_database,
+        }
+
     @classmethod
     def select_from(cls, config):
         return cls.query(config, f"""SELECT {cls.fields()} FROM {cls.table_name()}""")
@@ -28,14 +90,40 @@ class DatabaseBase(ABC):
     def query(cls, config, query, params=None):
         db = cls.connect_to_database(config)
         cursor = db.cursor(dictionary=True)
-        if params is not None:
-            cursor.execute(query, params)
-        else:
-            cursor.execute(query)
-        results = cursor.fetchall()
-        cursor.close()
-        db.close()
-        return results
+        try:
+            if params is not None:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+            db.close()
+
+    @classmethod
+    def stream_from(cls, config):
+        return cls.iter_query(
+            config, f"""SELECT {cls.fields()} FROM {cls.table_name()}"""
+        )
+
+    @classmethod
+    def iter_query(cls, config, query, params=None, chunk_size=None):
+        db = cls.connect_to_database(config)
+        cursor = db.cursor(dictionary=True, buffered=False)
+        try:
+            if params is not None:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+            while True:
+                rows = cursor.fetchmany(chunk_size or cls.STREAM_CHUNK_SIZE)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            db.consume_results()
+            cursor.close()
+            db.close()
 
     @classmethod
     @abc.abstractmethod
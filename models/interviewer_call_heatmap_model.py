@@ -0,0 +1,10 @@
+from dataclasses import dataclass, field
+
+
+@dataclass
+class InterviewerCallHeatmapCell:
+    weekday: str
+    hour: int
+    calls: int = 0
+    dial_secs: int = 0
+    outcomes: dict = field(default_factory=dict)
@@ -0,0 +1,124 @@
+import datetime
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+
+NO_CONTACT_STATUS = "Finished (No contact)"
+INVALID_TELEPHONE_NUMBER_OUTCOME_CODE = "320"
+
+
+@dataclass
+class InterviewerDailySummary:
+    interviewer: str
+    date: Optional[datetime.date]
+    questionnaire_name: str
+    survey: str = ""
+    total_records: int = 0
+    valid_records: int = 0
+    first_call_start_time: Optional[datetime.datetime] = None
+    last_call_end_time: Optional[datetime.datetime] = None
+    dial_secs: int = 0
+    timed_out_records: int = 0
+    missing_call_start_time: int = 0
+    missing_call_end_time: int = 0
+    invalid_telephone_numbers: int = 0
+    status_counts: dict = field(default_factory=dict)
+    no_contact_call_results: dict = field(default_factory=dict)
+
+    def add_record(self, record):
+        self.total_records += 1
+        status = record.get("status")
+        if is_property_name(status):
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+        if not is_present(record.get("call_start_time")):
+            self.missing_call_start_time += 1
+        if not is_present(record.get("call_end_time")):
+            self.missing_call_end_time += 1
+        if is_timed_out(status):
+            self.timed_out_records += 1
+        if not is_valid_record(record):
+            return
+
+        self.valid_records += 1
+        call_start_time = record["call_start_time"]
+        call_end_time = record["call_end_time"]
+        if (
+            self.first_call_start_time is None
+            or call_start_time < self.first_call_start_time
+        ):
+            self.first_call_start_time = call_start_time
+        if self.last_call_end_time is None or call_end_time > self.last_call_end_time:
+            self.last_call_end_time = call_end_time
+        if is_present(record.get("dial_secs")):
+            self.dial_secs += record["dial_secs"]
+        if record.get("outcome_code") == INVALID_TELEPHONE_NUMBER_OUTCOME_CODE:
+            self.invalid_telephone_numbers += 1
+        if status == NO_CONTACT_STATUS:
+            call_result = record.get("call_result")
+            if is_property_name(call_result):
+                self.no_contact_call_results[call_result] = (
+                    self.no_contact_call_results.get(call_result, 0) + 1
+                )
+
+    def datastore_key_name(self):
+        return f"{self.interviewer}-{self.date:%Y-%m-%d}-{self.questionnaire_name}"
+
+    def to_entity_dict(self):
+        entity = asdict(self)
+        entity["date"] = datetime.datetime.combine(self.date, datetime.time.min)
+        return entity
+
+    @classmethod
+    def from_entity(cls, entity):
+        summary = cls(**{key: entity.get(key) for key in cls.__dataclass_fields__})
+        if isinstance(summary.date, datetime.datetime):
+            summary.date = summary.date.date()
+        summary.status_counts = dict(summary.status_counts or {})
+        summary.no_contact_call_results = dict(summary.no_contact_call_results or {})
+        return summary
+
+    @classmethod
+    def from_call_history_records(cls, records):
+        summaries = {}
+        for record in records:
+            date = get_utc_date(record.get("call_start_time"))
+            key = (record.get("interviewer"), date, record.get("questionnaire_name"))
+            if key not in summaries:
+                summaries[key] = cls(
+                    interviewer=key[0],
+                    date=date,
+                    questionnaire_name=key[2],
+                    survey=record.get("survey", ""),
+                )
+            summaries[key].add_record(record)
+        return list(summaries.values())
+
+
+def get_utc_date(value):
+    if not isinstance(value, datetime.datetime):
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(datetime.timezone.utc)
+    return value.date()
+
+
+def is_present(value):
+    return value is not None and value != "" and value == value
+
+
+def is_property_name(value):
+    # Counts are stored as embedded entities keyed by value, and Datastore
+    # property names must be non-empty strings. Reports only look up named
+    # statuses and call results, so uncountable values are left out.
+    return isinstance(value, str) and value != ""
+
+
+def is_timed_out(status):
+    return isinstance(status, str) and "timed out" in status.lower()
+
+
+def is_valid_record(record):
+    return (
+        is_present(record.get("call_start_time"))
+        and is_present(record.get("call_end_time"))
+        and not is_timed_out(record.get("status"))
+    )
@@ -1,11 +1,19 @@
+import threading
+import time
 from dataclasses import dataclass
 
 from models.database_base_model import DatabaseBase
 from models.error_capture import RowNotFound
 
+_questionnaire_names: dict = {}
+_questionnaire_names_lock = threading.Lock()
+
 
 @dataclass
 class QuestionnaireConfigurationTable(DatabaseBase):
+    QUESTIONNAIRE_NAMES_TTL_SECONDS = 900
+    QUESTIONNAIRE_NAMES_MISS_REFRESH_SECONDS = 60
+
     @classmethod
     def table_name(cls) -> str:
         return "configuration.Configuration"
@@ -25,3 +33,48 @@ class QuestionnaireConfigurationTable(DatabaseBase):
             )
 
         return result[0]["InstrumentName"]
+
+    @classmethod
+    def get_questionnaire_names_by_id(cls, config) -> dict:
+        result = cls.query(
+            config, f"SELECT InstrumentId, InstrumentName FROM {cls.table_name()}"
+        )
+        return {str(row["InstrumentId"]): row["InstrumentName"] for row in result}
+
+    @classmethod
+    def get_cached_questionnaire_name_from_id(
+        cls, config, questionnaire_id: str
+    ) -> str:
+        # The whole configuration table is a few hundred rows, so it is loaded in
+        # one query and shared rather than looked up one InstrumentId at a time.
+        # Unknown ids reload it at most once a minute, so newly installed
+        # questionnaires are found without every miss going to the database.
+        cache_key = tuple(cls.connection_settings(config).values())
+        with _questionnaire_names_lock:
+            questionnaire_names, loaded_at = _questionnaire_names.get(
+                cache_key, ({}, None)
+            )
+            now = time.monotonic()
+            if (
+                loaded_at is None
+                or now - loaded_at > cls.QUESTIONNAIRE_NAMES_TTL_SECONDS
+                or (
+                    str(questionnaire_id) not in questionnaire_names
+                    and now - loaded_at > cls.QUESTIONNAIRE_NAMES_MISS_REFRESH_SECONDS
+                )
+            ):
+                print("Loading questionnaire names from the configuration table")
+                questionnaire_names = cls.get_questionnaire_names_by_id(config)
+                _questionnaire_names[cache_key] = (questionnaire_names, now)
+
+        if str(questionnaire_id) not in questionnaire_names:
+            raise RowNotFound(
+                f"Could not find configuration with InstrumentId: {questionnaire_id}"
+            )
+
+        return questionnaire_names[str(questionnaire_id)]
+
+
+def clear_questionnaire_names():
+    with _questionnaire_names_lock:
+        _questionnaire_names.clear()
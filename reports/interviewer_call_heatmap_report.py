@@ -0,0 +1,90 @@
+import calendar
+
+import numpy as np
+
+from functions.datastore_functions import get_call_history_records
+from models.interviewer_call_heatmap_model import InterviewerCallHeatmapCell
+from reports.interviewer_call_pattern_report import (
+    call_pattern_fields,
+    get_valid_records,
+    load_call_pattern_records,
+)
+
+REPORTING_TIMEZONE = "Europe/London"
+HOURS_IN_A_DAY = 24
+DAYS_IN_A_WEEK = 7
+
+
+def get_call_heatmap_report(
+    interviewer_name: str,
+    start_date_string: str,
+    end_date_string: str,
+    survey_tla: str,
+    questionnaires=None,
+) -> list[InterviewerCallHeatmapCell]:
+    # Only the call pattern fields are needed, so they are read from the index
+    # with a projection query rather than fetching whole entities.
+    result = get_call_history_records(
+        interviewer_name,
+        start_date_string,
+        end_date_string,
+        survey_tla,
+        questionnaires,
+        projection=call_pattern_fields,
+    )
+    records = load_call_pattern_records(result)
+
+    print(f"Calculating call heatmap data for interviewer '{interviewer_name}'")
+
+    if records.empty:
+        return []
+
+    valid_records = get_valid_records(records)
+    if valid_records.empty:
+        return []
+
+    return calculate_call_heatmap(valid_records)
+
+
+def calculate_call_heatmap(valid_records) -> list[InterviewerCallHeatmapCell]:
+    # Call times are stored in UTC, so they are converted to UK local time
+    # before being binned into weekday/hour cells. Every total is then
+    # accumulated with a single bincount over the cells.
+    number_of_cells = DAYS_IN_A_WEEK * HOURS_IN_A_DAY
+    call_start_times = (
+        valid_records["call_start_time"].dt.tz_convert(REPORTING_TIMEZONE).dt
+    )
+    cells = (
+        call_start_times.weekday.to_numpy() * HOURS_IN_A_DAY
+        + call_start_times.hour.to_numpy()
+    )
+    calls = np.bincount(cells, minlength=number_of_cells)
+    dial_secs = np.bincount(
+        cells,
+        weights=valid_records["dial_secs"].astype("Float64").fillna(0).to_numpy(),
+        minlength=number_of_cells,
+    )
+
+    statuses = valid_records["status"].astype("category")
+    status_codes = statuses.cat.codes.to_numpy()
+    has_status = status_codes >= 0
+    number_of_statuses = len(statuses.cat.categories)
+    outcomes = np.bincount(
+        cells[has_status] * number_of_statuses + status_codes[has_status],
+        minlength=number_of_cells * number_of_statuses,
+    ).reshape(number_of_cells, number_of_statuses)
+
+    return [
+        InterviewerCallHeatmapCell(
+            weekday=calendar.day_name[int(cell) // HOURS_IN_A_DAY],
+            hour=int(cell % HOURS_IN_A_DAY),
+            calls=int(calls[cell]),
+            dial_secs=round(dial_secs[cell]),
+            outcomes={
+                status: int(count)
+                for status, count in zip(statuses.cat.categories, outcomes[cell])
+                if count > 0
+            },
+        )
+        for cell in np.flatnonzero(calls)
+    ]
@@ -1,4 +1,9 @@
-from functions.datastore_functions import get_call_history_records
+from functions.datastore_functions import (
+    get_call_history_records,
+    get_call_history_records_page,
+    iter_call_history_records,
+)
+from reports.interviewer_call_pattern_report import calculate_call_pattern
 
 
 def get_call_history_report(
@@ -7,3 +12,32 @@ def get_call_history_report(
     return get_call_history_records(
         interviewer, start_date, end_date, survey_tla, questionnaires
     )
+
+
+def get_call_history_report_page(
+    interviewer, start_date, end_date, survey_tla, questionnaires, page_size, cursor
+):
+    records, next_cursor = get_call_history_records_page(
+        interviewer, start_date, end_date, survey_tla, questionnaires, page_size, cursor
+    )
+    return {"records": records, "next_cursor": next_cursor}
+
+
+def iter_call_history_report(
+    interviewer, start_date, end_date, survey_tla, questionnaires
+):
+    return iter_call_history_records(
+        interviewer, start_date, end_date, survey_tla, questionnaires
+    )
+
+
+def get_call_history_report_with_call_pattern(
+    interviewer, start_date, end_date, survey_tla, questionnaires
+):
+    records = get_call_history_records(
+        interviewer, start_date, end_date, survey_tla, questionnaires
+    )
+    print(
+        f"Calculating call pattern data for interviewer '{interviewer}' from the call history report records"
+    )
+    return {"records": records, "call_pattern": calculate_call_pattern(records)}
@@ -1,16 +1,53 @@
 import datetime
+from collections import Counter
+from typing import Optional
 
 import numpy as np
 import pandas as pd
 
-from functions.datastore_functions import get_call_history_records
+from functions.cache_functions import VersionedLRUCache
+from functions.datastore_functions import (
+    get_call_history_day_versions,
+    get_call_history_records,
+    get_call_history_status,
+    get_interviewer_daily_summaries,
+    get_team_call_history_records,
+    is_invalid,
+    parse_dates,
+)
 from models.error_capture import BertException
 from models.interviewer_call_pattern_model import (
     InterviewerCallPattern,
     InterviewerCallPatternWithNoValidData,
 )
+from models.interviewer_daily_summary_model import (
+    INVALID_TELEPHONE_NUMBER_OUTCOME_CODE,
+    NO_CONTACT_STATUS,
+    InterviewerDailySummary,
+    is_present,
+)
+
+CALL_PATTERN_FAST_PATH_THRESHOLD = 1000
+daily_call_pattern_cache = VersionedLRUCache(max_size=4096, ttl_seconds=3600)
 
 columns_to_check_for_nulls = ["call_start_time", "call_end_time"]
+call_pattern_fields = [
+    "call_start_time",
+    "call_end_time",
+    "dial_secs",
+    "status",
+    "call_result",
+    "outcome_code",
+]
+call_pattern_dtypes = {
+    "call_start_time": "datetime64[us, UTC]",
+    "call_end_time": "datetime64[us, UTC]",
+    "dial_secs": "Int64",
+    "status": "category",
+    "call_result": "category",
+    "outcome_code": "category",
+    "interviewer": "category",
+}
 
 
 def get_call_pattern_report(
@@ -19,126 +56,385 @@ def get_call_pattern_report(
     end_date_string: str,
     survey_tla: str,
     questionnaires=None,
+    fast_path_threshold=CALL_PATTERN_FAST_PATH_THRESHOLD,
 ) -> object:
-    result = get_call_history_records(
-        interviewer_name, start_date_string, end_date_string, survey_tla, questionnaires
+    status = get_call_history_status()
+    daily_summaries = get_cached_interviewer_daily_summaries(
+        interviewer_name,
+        start_date_string,
+        end_date_string,
+        survey_tla,
+        questionnaires,
+        status,
     )
-    records = pd.DataFrame(result)
+    if daily_summaries is not None:
+        print(
+            f"Calculating call pattern data for interviewer '{interviewer_name}' from {len(daily_summaries)} daily summaries"
+        )
+        return get_call_pattern_report_from_daily_summaries(daily_summaries)
 
+    result = get_call_history_records(
+        interviewer_name,
+        start_date_string,
+        end_date_string,
+        survey_tla,
+        questionnaires,
+        projection=call_pattern_fields,
+        status=status,
+    )
     print(f"Calculating call pattern data for interviewer '{interviewer_name}'")
+    return calculate_call_pattern(result, fast_path_threshold)
+
+
+def calculate_call_pattern(
+    result, fast_path_threshold=CALL_PATTERN_FAST_PATH_THRESHOLD
+) -> object:
+    if can_use_fast_path(result, fast_path_threshold):
+        print(
+            f"Calculating call pattern data from {len(result)} records without pandas"
+        )
+        return get_call_pattern_report_from_daily_summaries(
+            InterviewerDailySummary.from_call_history_records(result)
+        )
+
+    records = load_call_pattern_records(result, columns=call_pattern_fields)
 
     if records.empty:
         return {}
 
-    if no_valid_records_are_found(records):
-        return InterviewerCallPatternWithNoValidData(
-            discounted_invalid_cases=percentage_of_invalid_records(records),
-            invalid_fields=", ".join(provide_reasons_for_invalid_records(records)),
+    return get_call_pattern_report_from_records(records)
+
+
+def get_cached_interviewer_daily_summaries(
+    interviewer_name,
+    start_date_string,
+    end_date_string,
+    survey_tla,
+    questionnaires,
+    status,
+) -> Optional[list[InterviewerDailySummary]]:
+    # Each day's summaries are cached against the stamp ingestion writes for
+    # that call date, so only uncached or changed days are read from Datastore.
+    day_versions = get_call_history_day_versions(status)
+    start_date, end_date = parse_dates(start_date_string, end_date_string)
+    if day_versions is None or is_invalid(start_date) or is_invalid(end_date):
+        return get_interviewer_daily_summaries(
+            interviewer_name,
+            start_date_string,
+            end_date_string,
+            survey_tla,
+            questionnaires,
+            status,
         )
 
-    return InterviewerCallPattern(
-        total_valid_cases=len(get_valid_records(records)),
-        hours_worked=str(calculate_hours_worked_as_datetime(records)),
-        call_time=str(calculate_call_time_as_datetime(records)),
-        hours_on_calls_percentage=calculate_hours_on_call_percentage(records),
-        average_calls_per_hour=calculate_average_calls_per_hour(records),
-        refusals=number_of_records_which_has_status(records, "Finished (Non response)"),
-        no_contacts=number_of_records_which_has_status(
-            records, "Finished (No contact)"
-        ),
-        completed_successfully=number_of_records_which_has_status(records, "Completed"),
-        appointments_for_contacts=number_of_records_which_has_status(
-            records, "Finished (Appointment made)"
-        ),
-        web_nudge=number_of_records_which_has_status(records, "WebNudge"),
-        no_contact_answer_service=total_no_contact_records_with_call_result(
-            records, "AnswerService"
-        ),
-        no_contact_busy=total_no_contact_records_with_call_result(records, "Busy"),
-        no_contact_disconnect=total_no_contact_records_with_call_result(
-            records, "Disconnect"
-        ),
-        no_contact_no_answer=total_no_contact_records_with_call_result(
-            records, "NoAnswer"
-        ),
-        no_contact_invalid_telephone_number=total_no_contact_invalid_telephone_number(
-            records
-        ),
-        no_contact_other=total_no_contact_records_with_call_result(records, "Others"),
-        discounted_invalid_cases=percentage_of_invalid_records(records),
-        invalid_fields=", ".join(provide_reasons_for_invalid_records(records)),
+    days = [
+        start_date.date() + datetime.timedelta(days=offset)
+        for offset in range((end_date.date() - start_date.date()).days + 1)
+    ]
+    questionnaires_key = (
+        tuple(sorted(questionnaires)) if questionnaires is not None else None
     )
 
+    def cache_key(day):
+        return interviewer_name, day, survey_tla, questionnaires_key
 
-def calculate_hours_worked_as_datetime(records: pd.DataFrame) -> str:
-    valid_records = get_valid_records(records)
-    hours_worked_in_seconds = calculate_hours_worked_in_seconds(valid_records)
-
-    return convert_timedelta_to_hhmmss_as_string(
-        datetime.timedelta(seconds=hours_worked_in_seconds)
+    summaries_by_day = {}
+    missing_days = []
+    for day in days:
+        day_summaries = daily_call_pattern_cache.get(
+            cache_key(day), day_versions.get(day.isoformat())
+        )
+        if day_summaries is None:
+            missing_days.append(day)
+        else:
+            summaries_by_day[day] = day_summaries
+    print(
+        f"Reusing cached daily summaries for {len(days) - len(missing_days)} of {len(days)} days for interviewer '{interviewer_name}'"
     )
 
+    for first_day, last_day in group_consecutive_days(missing_days):
+        daily_summaries = get_interviewer_daily_summaries(
+            interviewer_name,
+            first_day.isoformat(),
+            last_day.isoformat(),
+            survey_tla,
+            questionnaires,
+            status,
+        )
+        if daily_summaries is None:
+            return None
+        fetched_summaries: dict[datetime.date, list[InterviewerDailySummary]] = {
+            first_day + datetime.timedelta(days=offset): []
+            for offset in range((last_day - first_day).days + 1)
+        }
+        for summary in daily_summaries:
+            fetched_summaries.setdefault(summary.date, []).append(summary)
+        for day, day_summaries in fetched_summaries.items():
+            daily_call_pattern_cache.set(
+                cache_key(day), day_summaries, day_versions.get(day.isoformat())
+            )
+            summaries_by_day[day] = day_summaries
+
+    return [summary for day in days for summary in summaries_by_day[day]]
+
+
+def group_consecutive_days(days) -> list[tuple[datetime.date, datetime.date]]:
+    ranges: list[tuple[datetime.date, datetime.date]] = []
+    for day in days:
+        if ranges and ranges[-1][1] + datetime.timedelta(days=1) == day:
+            ranges[-1] = (ranges[-1][0], day)
+        else:
+            ranges.append((day, day))
+    return ranges
+
+
+def can_use_fast_path(result, fast_path_threshold) -> bool:
+    # Small result sets are summarised in plain Python, which gives the same
+    # metrics without the fixed cost of building and filtering a DataFrame.
+    if not isinstance(result, list) or len(result) >= fast_path_threshold:
+        return False
+    return all(
+        isinstance(record.get(field), datetime.datetime)
+        or not is_present(record.get(field))
+        for record in result
+        for field in columns_to_check_for_nulls
+    )
 
-def calculate_call_time_as_datetime(records: pd.DataFrame) -> str:
-    valid_records = get_valid_records(records)
-    call_time_in_seconds = calculate_call_time_in_seconds(valid_records)
 
-    return convert_timedelta_to_hhmmss_as_string(
-        datetime.timedelta(seconds=call_time_in_seconds)
+def get_team_call_pattern_report(
+    start_date_string: str,
+    end_date_string: str,
+    survey_tla: str,
+    interviewers=None,
+) -> dict:
+    result = get_team_call_history_records(
+        start_date_string,
+        end_date_string,
+        survey_tla,
+        projection=call_pattern_fields + ["interviewer"],
     )
+    records = load_call_pattern_records(result)
 
+    if records.empty:
+        return {}
 
-def calculate_hours_on_call_percentage(
-    records: pd.DataFrame,
-) -> float:
-    valid_records = get_valid_records(records)
-
-    hours_worked_in_seconds = calculate_hours_worked_in_seconds(valid_records)
-    call_time_in_seconds = calculate_call_time_in_seconds(valid_records)
+    if interviewers is not None:
+        records = records.loc[records["interviewer"].isin(interviewers)]
 
-    return round(call_time_in_seconds / hours_worked_in_seconds * 100, 2)
+    print(
+        f"Calculating call pattern data for {records['interviewer'].nunique()} interviewers on survey '{survey_tla}'"
+    )
+    return {
+        interviewer: get_call_pattern_report_from_records(interviewer_records)
+        for interviewer, interviewer_records in records.groupby(
+            "interviewer", observed=True
+        )
+    }
+
+
+def load_call_pattern_records(result, columns=None) -> pd.DataFrame:
+    # Build the frame one typed column at a time, so pandas never infers object
+    # dtypes from the entities and empty strings are missing from the start.
+    if isinstance(result, pd.DataFrame):
+        column_names = result.columns
+        if columns is not None:
+            column_names = [column for column in column_names if column in columns]
+        columns = {column: result[column].tolist() for column in column_names}
+    else:
+        records = list(result)
+        column_names = dict.fromkeys(
+            column for record in records for column in record.keys()
+        )
+        if columns is not None:
+            column_names = [column for column in column_names if column in columns]
+        columns = {
+            column: [record.get(column) for record in records]
+            for column in column_names
+        }
+    return pd.DataFrame(
+        {
+            column: load_call_pattern_column(column, values)
+            for column, values in columns.items()
+        }
+    )
 
 
-def calculate_average_calls_per_hour(records: pd.DataFrame) -> float:
+def load_call_pattern_column(column, values) -> pd.Series:
+    values = pd.Series(
+        [None if isinstance(value, str) and value == "" else value for value in values],
+        dtype=object,
+    )
+    dtype = call_pattern_dtypes.get(column)
+    if dtype is None:
+        return values
+    try:
+        if dtype.startswith("datetime64"):
+            return pd.to_datetime(values, utc=True).astype(dtype)
+        if dtype == "Int64":
+            # Dial seconds are whole numbers in practice, but fractional values
+            # are kept as floats rather than failing the cast.
+            numbers = pd.to_numeric(values).astype("Float64")
+            if (numbers.dropna() % 1 == 0).all():
+                return numbers.astype(dtype)
+            return numbers
+        return values.astype(dtype)
+    except (TypeError, ValueError) as err:
+        raise BertException(f"load_call_pattern_records failed: {err}", 400)
+
+
+def get_call_pattern_report_from_records(records: pd.DataFrame) -> object:
+    # Every metric is derived from one valid-record frame and one daily groupby
+    # rather than each helper filtering the records again.
     valid_records = get_valid_records(records)
+    discounted_invalid_cases = (
+        0 if len(valid_records) == len(records) else len(records) - len(valid_records)
+    )
+    invalid_fields = ", ".join(provide_reasons_for_invalid_records(records))
+    if valid_records.empty:
+        return InterviewerCallPatternWithNoValidData(
+            discounted_invalid_cases=discounted_invalid_cases,
+            invalid_fields=invalid_fields,
+        )
 
-    hours_worked_in_seconds = calculate_hours_worked_in_seconds(valid_records)
-    number_of_valid_records = len(valid_records)
-    hours_worked = hours_worked_in_seconds / 3600
+    no_contact_records = valid_records["status"] == NO_CONTACT_STATUS
+    return build_interviewer_call_pattern(
+        total_valid_cases=len(valid_records),
+        hours_worked_in_seconds=calculate_hours_worked_in_seconds(valid_records),
+        call_time_in_seconds=calculate_call_time_in_seconds(valid_records),
+        status_counts=records["status"].value_counts(),
+        no_contact_call_results=valid_records.loc[
+            no_contact_records, "call_result"
+        ].value_counts(),
+        invalid_telephone_numbers=(
+            valid_records["outcome_code"] == INVALID_TELEPHONE_NUMBER_OUTCOME_CODE
+        ).sum(),
+        discounted_invalid_cases=discounted_invalid_cases,
+        invalid_fields=invalid_fields,
+    )
 
-    return round(number_of_valid_records / float(hours_worked), 2)
 
+def get_call_pattern_report_from_daily_summaries(daily_summaries) -> object:
+    total_records = sum(summary.total_records for summary in daily_summaries)
+    if total_records == 0:
+        return {}
 
-def total_no_contact_records_with_call_result(
-    records: pd.DataFrame, call_result: str
-) -> int:
-    valid_records = get_valid_records(records)
-    number_of_records_with_call_result = len(
-        valid_records.loc[
-            (valid_records["status"] == "Finished (No contact)")
-            & (valid_records["call_result"] == call_result)
-        ]
+    total_valid_records = sum(summary.valid_records for summary in daily_summaries)
+    discounted_invalid_cases = (
+        0
+        if total_valid_records == total_records
+        else total_records - total_valid_records
     )
+    invalid_fields = ", ".join(
+        provide_reasons_for_invalid_daily_summaries(daily_summaries)
+    )
+    if total_valid_records == 0:
+        return InterviewerCallPatternWithNoValidData(
+            discounted_invalid_cases=discounted_invalid_cases,
+            invalid_fields=invalid_fields,
+        )
 
-    return number_of_records_with_call_result
+    status_counts: Counter[str] = Counter()
+    no_contact_call_results: Counter[str] = Counter()
+    for summary in daily_summaries:
+        status_counts.update(summary.status_counts)
+        no_contact_call_results.update(summary.no_contact_call_results)
+    return build_interviewer_call_pattern(
+        total_valid_cases=total_valid_records,
+        hours_worked_in_seconds=calculate_hours_worked_in_seconds_from_daily_summaries(
+            daily_summaries
+        ),
+        call_time_in_seconds=round(
+            sum(summary.dial_secs for summary in daily_summaries)
+        ),
+        status_counts=status_counts,
+        no_contact_call_results=no_contact_call_results,
+        invalid_telephone_numbers=sum(
+            summary.invalid_telephone_numbers for summary in daily_summaries
+        ),
+        discounted_invalid_cases=discounted_invalid_cases,
+        invalid_fields=invalid_fields,
+    )
 
 
-def total_no_contact_invalid_telephone_number(records: pd.DataFrame) -> int:
-    valid_records = get_valid_records(records)
-    number_of_records_with_invalid_telephone_number = len(
-        valid_records.loc[valid_records["outcome_code"] == "320"]
-    )
+def build_interviewer_call_pattern(
+    total_valid_cases,
+    hours_worked_in_seconds,
+    call_time_in_seconds,
+    status_counts,
+    no_contact_call_results,
+    invalid_telephone_numbers,
+    discounted_invalid_cases,
+    invalid_fields,
+) -> InterviewerCallPattern:
+    def count_status(status):
+        return int(status_counts.get(status, 0))
 
-    return number_of_records_with_invalid_telephone_number
+    def count_no_contact_call_result(call_result):
+        return int(no_contact_call_results.get(call_result, 0))
 
+    return InterviewerCallPattern(
+        total_valid_cases=total_valid_cases,
+        hours_worked=convert_timedelta_to_hhmmss_as_string(
+            datetime.timedelta(seconds=hours_worked_in_seconds)
+        ),
+        call_time=convert_timedelta_to_hhmmss_as_string(
+            datetime.timedelta(seconds=call_time_in_seconds)
+        ),
+        hours_on_calls_percentage=round(
+            call_time_in_seconds / hours_worked_in_seconds * 100, 2
+        ),
+        average_calls_per_hour=round(
+            total_valid_cases / float(hours_worked_in_seconds / 3600), 2
+        ),
+        refusals=count_status("Finished (Non response)"),
+        no_contacts=count_status(NO_CONTACT_STATUS),
+        completed_successfully=count_status("Completed"),
+        appointments_for_contacts=count_status("Finished (Appointment made)"),
+        web_nudge=count_status("WebNudge"),
+        no_contact_answer_service=count_no_contact_call_result("AnswerService"),
+        no_contact_busy=count_no_contact_call_result("Busy"),
+        no_contact_disconnect=count_no_contact_call_result("Disconnect"),
+        no_contact_no_answer=count_no_contact_call_result("NoAnswer"),
+        no_contact_invalid_telephone_number=int(invalid_telephone_numbers),
+        no_contact_other=count_no_contact_call_result("Others"),
+        discounted_invalid_cases=discounted_invalid_cases,
+        invalid_fields=invalid_fields,
+    )
 
-def percentage_of_invalid_records(records: pd.DataFrame) -> int:
-    valid_records = get_valid_records(records)
 
-    if len(valid_records) == len(records):
-        return 0
+def calculate_hours_worked_in_seconds_from_daily_summaries(daily_summaries) -> float:
+    # Hours worked is measured per day across every questionnaire, so the
+    # per-questionnaire rows are merged into one span per day first.
+    working_days: dict[datetime.date, tuple[datetime.datetime, datetime.datetime]] = {}
+    for summary in daily_summaries:
+        if summary.first_call_start_time is None:
+            continue
+        first_call_start_time, last_call_end_time = working_days.get(
+            summary.date,
+            (summary.first_call_start_time, summary.last_call_end_time),
+        )
+        working_days[summary.date] = (
+            min(first_call_start_time, summary.first_call_start_time),
+            max(last_call_end_time, summary.last_call_end_time),
+        )
+    return sum(
+        (
+            last_call_end_time - first_call_start_time
+            for first_call_start_time, last_call_end_time in working_days.values()
+        ),
+        datetime.timedelta(),
+    ).total_seconds()
+
 
-    return len(records) - len(valid_records)
+def provide_reasons_for_invalid_daily_summaries(daily_summaries) -> list[str]:
+    reasons = []
+    if any(summary.timed_out_records for summary in daily_summaries):
+        reasons.append("'status' column had timed out call status")
+    if any(summary.missing_call_start_time for summary in daily_summaries):
+        reasons.append("'call_start_time' column had missing data")
+    if any(summary.missing_call_end_time for summary in daily_summaries):
+        reasons.append("'call_end_time' column had missing data")
+    return reasons
 
 
 def provide_reasons_for_invalid_records(records: pd.DataFrame) -> list[str]:
@@ -193,18 +489,7 @@ def calculate_call_time_in_seconds(records: pd.DataFrame) -> int:
         raise BertException(f"calculate_call_time_in_seconds failed: {err}", 400)
 
 
-def number_of_records_which_has_status(records: pd.DataFrame, status: str) -> int:
-    try:
-        return len(records.loc[records["status"] == status])
-    except Exception as err:
-        raise BertException(f"number_of_records_which_has_status failed: {err}", 400)
-
-
 def convert_timedelta_to_hhmmss_as_string(td: datetime.timedelta) -> str:
     hours, remainder = divmod(td.total_seconds(), 3600)
     minutes, seconds = divmod(remainder, 60)
     return f"{int(hours):02}:{int(minutes):02}:{int(seconds):02}"
-
-
-def no_valid_records_are_found(records: pd.DataFrame) -> bool:
-    return get_valid_records(records).empty
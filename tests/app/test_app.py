@@ -3,6 +3,7 @@ from unittest.mock import patch
 
 from models.config_model import Config
 from models.error_capture import BertException
+from models.interviewer_call_heatmap_model import InterviewerCallHeatmapCell
 
 
 def test_load_config():
@@ -143,3 +144,127 @@ def test_appointment_language_summary(
     )
     assert response.status_code == 200
     assert response.get_data() is not None
+
+
+@patch("app.app.get_call_history_report_page")
+def test_call_history_report_returns_a_page_of_records_with_a_cursor(
+    mock_get_call_history_report_page, client
+):
+    mock_get_call_history_report_page.return_value = {
+        "records": [{"serial_number": "1001011"}],
+        "next_cursor": "abc",
+    }
+    response = client.get(
+        "/api/reports/call-history/matpal?start-date=2021-01-01&end-date=2021-01-01&page-size=1&cursor=xyz"
+    )
+    assert response.status_code == 200
+    assert json.loads(response.get_data(as_text=True)) == {
+        "records": [{"serial_number": "1001011"}],
+        "next_cursor": "abc",
+    }
+    mock_get_call_history_report_page.assert_called_with(
+        "matpal", "2021-01-01", "2021-01-01", None, None, 1, "xyz"
+    )
+
+
+@patch("app.app.iter_call_history_report")
+def test_call_history_report_streams_ndjson(mock_iter_call_history_report, client):
+    mock_iter_call_history_report.return_value = iter(
+        [{"serial_number": "1001011"}, {"serial_number": "1001012"}]
+    )
+    response = client.get(
+        "/api/reports/call-history/matpal?start-date=2021-01-01&end-date=2021-01-01&format=ndjson"
+    )
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    assert [
+        json.loads(line) for line in response.get_data(as_text=True).splitlines()
+    ] == [{"serial_number": "1001011"}, {"serial_number": "1001012"}]
+
+
+def test_call_history_report_rejects_a_cursor_with_ndjson(client):
+    response = client.get(
+        "/api/reports/call-history/matpal?start-date=2021-01-01&end-date=2021-01-01&format=ndjson&cursor=xyz"
+    )
+    assert response.status_code == 400
+
+
+@patch("app.app.get_team_call_pattern_report")
+def test_team_call_pattern_report(
+    mock_get_team_call_pattern_report, client, interviewer_call_pattern_report
+):
+    mock_get_team_call_pattern_report.return_value = {
+        "matpal": interviewer_call_pattern_report
+    }
+    response = client.get(
+        "/api/reports/team-call-pattern?start-date=2021-01-01&end-date=2021-01-01&survey-tla=opn&interviewers=matpal,ricer"
+    )
+    assert response.status_code == 200
+    assert json.loads(response.get_data(as_text=True)) == {
+        "matpal": json.loads(interviewer_call_pattern_report.json())
+    }
+    mock_get_team_call_pattern_report.assert_called_with(
+        "2021-01-01", "2021-01-01", "OPN", ["matpal", "ricer"]
+    )
+
+
+def test_team_call_pattern_report_requires_a_survey(client):
+    response = client.get(
+        "/api/reports/team-call-pattern?start-date=2021-01-01&end-date=2021-01-01"
+    )
+    assert response.status_code == 400
+
+
+@patch("app.app.get_call_heatmap_report")
+def test_call_heatmap_report(mock_get_call_heatmap_report, client):
+    mock_get_call_heatmap_report.return_value = [
+        InterviewerCallHeatmapCell(
+            weekday="Monday", hour=10, calls=2, dial_secs=90, outcomes={"Completed": 2}
+        )
+    ]
+    response = client.get(
+        "/api/reports/call-heatmap/matpal?start-date=2021-01-01&end-date=2021-01-01&survey-tla=opn"
+    )
+    assert response.status_code == 200
+    assert json.loads(response.get_data(as_text=True)) == [
+        {
+            "weekday": "Monday",
+            "hour": 10,
+            "calls": 2,
+            "dial_secs": 90,
+            "outcomes": {"Completed": 2},
+        }
+    ]
+    mock_get_call_heatmap_report.assert_called_with(
+        "matpal", "2021-01-01", "2021-01-01", "OPN", None
+    )
+
+
+@patch("app.app.get_call_history_report_with_call_pattern")
+def test_call_history_report_includes_the_call_pattern(
+    mock_get_call_history_report_with_call_pattern,
+    client,
+    interviewer_call_pattern_report,
+):
+    mock_get_call_history_report_with_call_pattern.return_value = {
+        "records": [{"serial_number": "1001011"}],
+        "call_pattern": interviewer_call_pattern_report,
+    }
+    response = client.get(
+        "/api/reports/call-history/matpal?start-date=2021-01-01&end-date=2021-01-01&include=call-pattern"
+    )
+    assert response.status_code == 200
+    assert json.loads(response.get_data(as_text=True)) == {
+        "records": [{"serial_number": "1001011"}],
+        "call_pattern": json.loads(interviewer_call_pattern_report.json()),
+    }
+    mock_get_call_history_report_with_call_pattern.assert_called_with(
+        "matpal", "2021-01-01", "2021-01-01", None, None
+    )
+
+
+def test_call_history_report_rejects_an_unknown_include(client):
+    response = client.get(
+        "/api/reports/call-history/matpal?start-date=2021-01-01&end-date=2021-01-01&include=heatmap"
+    )
+    assert response.status_code == 400
@@ -16,6 +16,29 @@ from tests.helpers.interviewer_call_pattern_helpers import (
 )
 
 
+@pytest.fixture(autouse=True)
+def call_history_status():
+    # Report tests patch Datastore per test, so the call history status is
+    # empty unless a test opts in to caching or the daily summaries by giving
+    # it a value. Reports that read the status themselves share the same mock.
+    from functions.datastore_functions import call_history_records_cache
+    from reports.interviewer_call_pattern_report import daily_call_pattern_cache
+
+    call_history_records_cache.clear()
+    daily_call_pattern_cache.clear()
+    get_call_history_status = mock.MagicMock(return_value={})
+    with mock.patch(
+        "functions.datastore_functions.get_call_history_status",
+        get_call_history_status,
+    ), mock.patch(
+        "reports.interviewer_call_pattern_report.get_call_history_status",
+        get_call_history_status,
+    ):
+        yield get_call_history_status
+    call_history_records_cache.clear()
+    daily_call_pattern_cache.clear()
+
+
 @pytest.fixture
 def config():
     return Config(
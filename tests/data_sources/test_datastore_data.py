@@ -1,8 +1,10 @@
 import os
+from datetime import datetime, timedelta, timezone
 from unittest import mock
 from unittest.mock import patch
 
 import pytest
+from google.cloud import datastore
 
 from data_sources.call_history_data import CallHistoryClient
 from models.call_history_model import CallHistory
@@ -79,7 +81,7 @@ def test_split_into_batches(list_to_split, number_to_split_by, expected):
     },
 )
 @patch("data_sources.call_history_data.get_cati_call_history_from_database")
-def test_get_cati_call_history(mock_get_cati_call_history_from_database):
+def test_iter_cati_call_history(mock_get_cati_call_history_from_database):
     # Arrange
     mock_get_cati_call_history_from_database.return_value = [
         {
@@ -103,7 +105,7 @@ def test_get_cati_call_history(mock_get_cati_call_history_from_database):
 
     # Execution
     call_history_client = CallHistoryClient(mock.MagicMock, config)
-    dial_history = call_history_client.get_cati_call_history()
+    dial_history = list(call_history_client.iter_cati_call_history())
 
     # Assertion
     assert len(dial_history) == 1
@@ -184,3 +186,653 @@ def test_filter_out_existing_call_history_records(
         )
         == 0
     )
+
+
+@pytest.mark.parametrize(
+    "status, max_id, expected",
+    [
+        (None, 100, None),
+        ({"last_updated": datetime(2021, 5, 19)}, 100, None),
+        (
+            {
+                "last_dial_history_id": 90,
+                "last_full_reconcile": datetime.now(timezone.utc) - timedelta(days=1),
+            },
+            100,
+            90,
+        ),
+        (
+            {
+                "last_dial_history_id": 90,
+                "last_full_reconcile": datetime.now(timezone.utc) - timedelta(days=8),
+            },
+            100,
+            None,
+        ),
+        (
+            {
+                "last_dial_history_id": 90,
+                "last_full_reconcile": datetime.now(timezone.utc) - timedelta(days=1),
+            },
+            50,
+            None,
+        ),
+    ],
+)
+def test_get_extraction_watermark(status, max_id, expected):
+    call_history_client = CallHistoryClient(mock.MagicMock(), mock.MagicMock())
+    assert call_history_client.get_extraction_watermark(status, max_id) == expected
+
+
+@patch("data_sources.call_history_data.get_cati_call_history_fingerprint_from_database")
+@patch("data_sources.call_history_data.get_cati_call_history_from_database")
+def test_call_history_extraction_process_only_extracts_rows_past_the_watermark(
+    mock_get_cati_call_history_from_database,
+    mock_get_cati_call_history_fingerprint_from_database,
+    config,
+):
+    datastore_client = mock.MagicMock()
+    datastore_client.get.return_value = {
+        "last_updated": datetime(2021, 5, 19),
+        "last_dial_history_id": 90,
+        "last_full_reconcile": datetime.now(timezone.utc) - timedelta(days=1),
+    }
+    mock_get_cati_call_history_fingerprint_from_database.return_value = [
+        {
+            "InstrumentId": "a",
+            "Total": 100,
+            "MinId": 1,
+            "MaxId": 120,
+            "MaxEndTime": None,
+        }
+    ]
+    mock_get_cati_call_history_from_database.return_value = []
+
+    CallHistoryClient(datastore_client, config).call_history_extraction_process()
+
+    mock_get_cati_call_history_from_database.assert_called_with(config, 90, 120, "a")
+    status = datastore_client.put.call_args[0][0]
+    assert status["last_dial_history_id"] == 120
+    assert (
+        status["last_full_reconcile"]
+        == datastore_client.get.return_value["last_full_reconcile"]
+    )
+
+
+def test_get_call_history_keys_only_looks_up_the_extracted_records(config):
+    datastore_client = mock.MagicMock()
+    datastore_client.key.side_effect = lambda kind, name: datastore.Key(
+        kind, name, project="test"
+    )
+    datastore_client.get_multi.side_effect = lambda keys: [
+        datastore.Entity(key) for key in keys if key.name.startswith("1-")
+    ]
+    call_history_data = [
+        CallHistory(
+            serial_number="1001011",
+            call_number=call_number,
+            dial_number=1,
+            busy_dials=0,
+            call_start_time="2021/05/19 14:59:01",
+            call_end_time="2021/05/19 14:59:17",
+            dial_secs=16,
+            status="Finished (Non response)",
+            interviewer="matpal",
+            call_result="NonRespons",
+            update_info=None,
+            appointment_info=None,
+            questionnaire_name="OPN2101A",
+        )
+        for call_number in [1, 2, 3]
+    ]
+    call_history_client = CallHistoryClient(datastore_client, config)
+    call_history_client.LOOKUP_BATCH_SIZE = 2
+
+    result = call_history_client.get_call_history_keys(call_history_data)
+
+    assert result == {"1-1-0-OPN2101A-1001011-2021/05/19 14:59:01": None}
+    assert datastore_client.get_multi.call_count == 2
+    datastore_client.query.assert_not_called()
+
+
+def test_iter_batches():
+    batches = CallHistoryClient.iter_batches(iter(range(5)), 2)
+    assert list(batches) == [[0, 1], [2, 3], [4]]
+
+
+def test_delete_historical_call_history_deletes_every_key_in_batches(config):
+    datastore_client = mock.MagicMock()
+    datastore_client.query.return_value.fetch.side_effect = [
+        iter([mock.MagicMock(key=f"key-{i}") for i in range(3)]),
+        iter([]),
+    ]
+    call_history_client = CallHistoryClient(datastore_client, config)
+    call_history_client.DELETE_BATCH_SIZE = 2
+
+    call_history_client.delete_historical_call_history()
+
+    assert [call.kwargs["kind"] for call in datastore_client.query.call_args_list] == [
+        "CallHistory",
+        "InterviewerDailySummary",
+    ]
+    assert datastore_client.query.return_value.fetch.call_args_list == [
+        mock.call(),
+        mock.call(),
+    ]
+    assert sorted(
+        call.args[0] for call in datastore_client.delete_multi.call_args_list
+    ) == [["key-0", "key-1"], ["key-2"]]
+
+
+def test_delete_historical_call_history_reports_a_failed_deletion(config, capsys):
+    datastore_client = mock.MagicMock()
+    datastore_client.query.return_value.fetch.side_effect = [
+        iter([mock.MagicMock(key="key-0")]),
+        iter([]),
+    ]
+    datastore_client.delete_multi.side_effect = Exception("Datastore unavailable")
+
+    CallHistoryClient(datastore_client, config).delete_historical_call_history()
+
+    output = capsys.readouterr().out
+    assert "Failed to delete call history records older than a year" in output
+    assert "Deleted None records" not in output
+
+
+@pytest.mark.parametrize(
+    "from_id, to_id, range_length, expected",
+    [
+        (0, 10, 4, [(0, 4), (4, 8), (8, 10)]),
+        (90, 120, 50, [(90, 120)]),
+        (120, 120, 50, []),
+    ],
+)
+def test_split_into_id_ranges(from_id, to_id, range_length, expected):
+    assert (
+        CallHistoryClient.split_into_id_ranges(from_id, to_id, range_length) == expected
+    )
+
+
+@patch("data_sources.call_history_data.get_cati_call_history_fingerprint_from_database")
+@patch("data_sources.call_history_data.get_cati_call_history_from_database")
+def test_call_history_extraction_process_resumes_a_full_reconcile_from_its_checkpoint(
+    mock_get_cati_call_history_from_database,
+    mock_get_cati_call_history_fingerprint_from_database,
+    config,
+):
+    datastore_client = mock.MagicMock()
+    datastore_client.get.return_value = {
+        "last_dial_history_id": 90,
+        "last_full_reconcile": datetime.now(timezone.utc) - timedelta(days=8),
+        "reconcile_checkpoint_id": 60,
+        "daily_summaries_backfilled": True,
+    }
+    mock_get_cati_call_history_fingerprint_from_database.return_value = [
+        {
+            "InstrumentId": "a",
+            "Total": 100,
+            "MinId": 1,
+            "MaxId": 120,
+            "MaxEndTime": None,
+        }
+    ]
+    mock_get_cati_call_history_from_database.return_value = []
+    call_history_client = CallHistoryClient(datastore_client, config)
+    call_history_client.CHECKPOINT_ID_RANGE = 40
+
+    call_history_client.call_history_extraction_process()
+
+    assert [
+        call.args for call in mock_get_cati_call_history_from_database.call_args_list
+    ] == [(config, 60, 100, "a"), (config, 100, 120, "a")]
+    checkpoints = [call.args[0] for call in datastore_client.put.call_args_list]
+    assert [checkpoint["reconcile_checkpoint_id"] for checkpoint in checkpoints] == [
+        100,
+        120,
+        None,
+    ]
+    assert checkpoints[-1]["last_dial_history_id"] == 120
+    assert checkpoints[-1]["last_full_reconcile"] > datetime.now(
+        timezone.utc
+    ) - timedelta(minutes=1)
+
+
+@patch("data_sources.call_history_data.get_cati_call_history_fingerprint_from_database")
+@patch("data_sources.call_history_data.get_cati_call_history_from_database")
+def test_call_history_extraction_process_skips_when_the_fingerprint_has_not_changed(
+    mock_get_cati_call_history_from_database,
+    mock_get_cati_call_history_fingerprint_from_database,
+    config,
+):
+    fingerprint_rows = [
+        {
+            "InstrumentId": "a",
+            "Total": 100,
+            "MinId": 1,
+            "MaxId": 120,
+            "MaxEndTime": None,
+        },
+        {"InstrumentId": "b", "Total": 5, "MaxId": 110, "MaxEndTime": None},
+    ]
+    datastore_client = mock.MagicMock()
+    datastore_client.get.return_value = {
+        "last_dial_history_id": 120,
+        "last_full_reconcile": datetime.now(timezone.utc) - timedelta(days=1),
+        "dial_history_fingerprint": CallHistoryClient.generate_call_history_fingerprint(
+            fingerprint_rows
+        ),
+        "daily_summaries_backfilled": True,
+    }
+    mock_get_cati_call_history_fingerprint_from_database.return_value = fingerprint_rows
+
+    CallHistoryClient(datastore_client, config).call_history_extraction_process()
+
+    mock_get_cati_call_history_from_database.assert_not_called()
+    datastore_client.put.assert_not_called()
+
+
+@patch.object(CallHistoryClient, "update_interviewer_daily_summaries")
+@patch("data_sources.call_history_data.get_cati_call_history_fingerprint_from_database")
+@patch("data_sources.call_history_data.get_cati_call_history_from_database")
+def test_call_history_extraction_process_skips_a_second_run_with_no_changes(
+    mock_get_cati_call_history_from_database,
+    mock_get_cati_call_history_fingerprint_from_database,
+    mock_update_interviewer_daily_summaries,
+    config,
+):
+    yesterday = datetime.now() - timedelta(days=1)
+    statuses = {}
+    datastore_client = mock.MagicMock()
+    datastore_client.get.side_effect = lambda key: statuses.get("call_history")
+    datastore_client.put.side_effect = lambda entity: statuses.update(
+        call_history=entity
+    )
+    datastore_client.get_multi.side_effect = lambda keys: [
+        datastore.Entity(key) for key in keys
+    ]
+    mock_get_cati_call_history_fingerprint_from_database.return_value = [
+        {
+            "InstrumentId": "a",
+            "Total": 1,
+            "MinId": 1,
+            "MaxId": 1,
+            "MaxEndTime": yesterday,
+        }
+    ]
+    mock_get_cati_call_history_from_database.return_value = [
+        {
+            "InstrumentName": "OPN2101A",
+            "PrimaryKeyValue": "1001011",
+            "CallNumber": 1,
+            "DialNumber": 1,
+            "BusyDials": 0,
+            "StartTime": yesterday,
+            "EndTime": yesterday + timedelta(seconds=16),
+            "Interviewer": "matpal",
+        }
+    ]
+    call_history_client = CallHistoryClient(datastore_client, config)
+
+    call_history_client.call_history_extraction_process()
+    extractions = mock_get_cati_call_history_from_database.call_count
+    writes = datastore_client.put.call_count
+    call_history_client.call_history_extraction_process()
+
+    assert extractions == 1
+    assert "dial_history_fingerprint" in statuses["call_history"]
+    assert mock_get_cati_call_history_from_database.call_count == extractions
+    assert datastore_client.put.call_count == writes
+
+
+@patch.object(CallHistoryClient, "backfill_interviewer_daily_summaries")
+@patch("data_sources.call_history_data.get_cati_call_history_fingerprint_from_database")
+@patch("data_sources.call_history_data.get_cati_call_history_from_database")
+def test_call_history_extraction_process_does_not_record_the_fingerprint_at_a_checkpoint(
+    mock_get_cati_call_history_from_database,
+    mock_get_cati_call_history_fingerprint_from_database,
+    mock_backfill_interviewer_daily_summaries,
+    config,
+):
+    datastore_client = mock.MagicMock()
+    datastore_client.get.return_value = None
+    mock_get_cati_call_history_fingerprint_from_database.return_value = [
+        {
+            "InstrumentId": "a",
+            "Total": 100,
+            "MinId": 1,
+            "MaxId": 120,
+            "MaxEndTime": None,
+        }
+    ]
+    mock_get_cati_call_history_from_database.return_value = []
+    call_history_client = CallHistoryClient(datastore_client, config)
+    call_history_client.CHECKPOINT_ID_RANGE = 50
+
+    call_history_client.call_history_extraction_process()
+
+    statuses = [call.args[0] for call in datastore_client.put.call_args_list]
+    assert ["dial_history_fingerprint" in status for status in statuses] == [
+        False,
+        False,
+        False,
+        True,
+    ]
+
+
+def test_generate_call_history_fingerprint_changes_when_an_instrument_changes():
+    fingerprint_rows = [
+        {
+            "InstrumentId": "a",
+            "Total": 100,
+            "MinId": 1,
+            "MaxId": 120,
+            "MaxEndTime": None,
+        }
+    ]
+    changed_fingerprint_rows = [
+        {
+            "InstrumentId": "a",
+            "Total": 100,
+            "MaxId": 120,
+            "MaxEndTime": datetime(2021, 5, 19, 14, 59, 17),
+        }
+    ]
+
+    assert CallHistoryClient.generate_call_history_fingerprint(
+        fingerprint_rows
+    ) != CallHistoryClient.generate_call_history_fingerprint(changed_fingerprint_rows)
+
+
+def test_get_instrument_ids_in_id_range_skips_instruments_without_rows_in_the_range():
+    fingerprint_rows = [
+        {"InstrumentId": "old", "MinId": 1, "MaxId": 50},
+        {"InstrumentId": "live", "MinId": 10, "MaxId": 150},
+        {"InstrumentId": "new", "MinId": 130, "MaxId": 140},
+    ]
+
+    assert CallHistoryClient.get_instrument_ids_in_id_range(
+        fingerprint_rows, 60, 120
+    ) == ["live"]
+
+
+@patch("data_sources.call_history_data.get_cati_call_history_from_database")
+def test_iter_cati_call_history_merges_the_rows_of_every_instrument(
+    mock_get_cati_call_history_from_database, config
+):
+    mock_get_cati_call_history_from_database.side_effect = (
+        lambda _config, _from_id, _to_id, instrument_id: iter(
+            [
+                {
+                    "InstrumentName": instrument_id,
+                    "PrimaryKeyValue": "1001011",
+                    "StartTime": "2021/05/19 14:59:01",
+                }
+            ]
+        )
+    )
+    call_history_client = CallHistoryClient(mock.MagicMock(), config)
+
+    result = call_history_client.iter_cati_call_history(
+        0, 100, ["OPN2101A", "LMS2101_AA1"]
+    )
+
+    assert sorted(record.questionnaire_name for record in result) == [
+        "LMS2101_AA1",
+        "OPN2101A",
+    ]
+
+
+@patch("data_sources.call_history_data.get_cati_call_history_from_database")
+def test_iter_cati_call_history_hands_rows_over_through_a_bounded_queue(
+    mock_get_cati_call_history_from_database, config
+):
+    mock_get_cati_call_history_from_database.side_effect = (
+        lambda _config, _from_id, _to_id, instrument_id: (
+            {"InstrumentName": instrument_id, "PrimaryKeyValue": str(serial)}
+            for serial in range(50)
+        )
+    )
+    call_history_client = CallHistoryClient(mock.MagicMock(), config)
+    call_history_client.EXTRACTION_QUEUE_SIZE = 2
+
+    result = list(
+        call_history_client.iter_cati_call_history(
+            0, 100, ["OPN2101A", "LMS2101_AA1", "LMS2101_BB1"]
+        )
+    )
+
+    assert len(result) == 150
+
+
+@patch("data_sources.call_history_data.get_cati_call_history_from_database")
+def test_iter_cati_call_history_raises_a_failed_partition(
+    mock_get_cati_call_history_from_database, config
+):
+    def get_rows(_config, _from_id, _to_id, instrument_id):
+        if instrument_id == "LMS2101_AA1":
+            raise RuntimeError("MySQL connection lost")
+        return iter([{"InstrumentName": instrument_id}])
+
+    mock_get_cati_call_history_from_database.side_effect = get_rows
+    call_history_client = CallHistoryClient(mock.MagicMock(), config)
+
+    with pytest.raises(RuntimeError, match="MySQL connection lost"):
+        list(
+            call_history_client.iter_cati_call_history(
+                0, 100, ["OPN2101A", "LMS2101_AA1"]
+            )
+        )
+
+
+@patch("data_sources.call_history_data.get_cati_call_history_from_database")
+def test_iter_cati_call_history_stops_the_workers_when_closed_early(
+    mock_get_cati_call_history_from_database, config
+):
+    closed_partitions = []
+
+    def get_rows(_config, _from_id, _to_id, instrument_id):
+        try:
+            for serial in range(1000):
+                yield {"InstrumentName": instrument_id, "PrimaryKeyValue": str(serial)}
+        finally:
+            closed_partitions.append(instrument_id)
+
+    mock_get_cati_call_history_from_database.side_effect = get_rows
+    call_history_client = CallHistoryClient(mock.MagicMock(), config)
+    call_history_client.EXTRACTION_QUEUE_SIZE = 1
+
+    result = call_history_client.iter_cati_call_history(
+        0, 100, ["OPN2101A", "LMS2101_AA1"]
+    )
+    next(result)
+    result.close()
+
+    assert sorted(closed_partitions) == ["LMS2101_AA1", "OPN2101A"]
+
+
+def test_update_interviewer_daily_summaries_rebuilds_each_interviewer_day_from_datastore(
+    config,
+):
+    datastore_client = mock.MagicMock()
+    datastore_client.key.side_effect = lambda kind, name: datastore.Key(
+        kind, name, project="test"
+    )
+    datastore_client.query.return_value.fetch.return_value = [
+        {
+            "interviewer": "matpal",
+            "questionnaire_name": "OPN2101A",
+            "survey": "OPN",
+            "call_start_time": datetime(2021, 5, 19, 14, 59, 1),
+            "call_end_time": datetime(2021, 5, 19, 14, 59, 17),
+            "dial_secs": 16,
+            "status": "Finished (No contact)",
+            "call_result": "Busy",
+            "outcome_code": "120",
+        }
+    ]
+    call_history_data = [
+        CallHistory(
+            serial_number="1001011",
+            call_number=call_number,
+            dial_number=1,
+            busy_dials=0,
+            call_start_time=datetime(2021, 5, 19, 14, call_number),
+            call_end_time=datetime(2021, 5, 19, 15, call_number),
+            dial_secs=16,
+            status="Finished (No contact)",
+            interviewer="matpal",
+            call_result="Busy",
+            update_info=None,
+            appointment_info=None,
+            questionnaire_name="OPN2101A",
+        )
+        for call_number in [1, 2]
+    ]
+
+    CallHistoryClient(datastore_client, config).update_interviewer_daily_summaries(
+        call_history_data
+    )
+
+    query = datastore_client.query.return_value
+    assert datastore_client.query.call_count == 1
+    query.add_filter.assert_any_call("call_start_time", ">=", datetime(2021, 5, 19))
+    query.add_filter.assert_any_call("call_start_time", "<", datetime(2021, 5, 20))
+    [summaries] = [call.args[0] for call in datastore_client.put_multi.call_args_list]
+    assert [summary.key.name for summary in summaries] == ["matpal-2021-05-19-OPN2101A"]
+    assert summaries[0]["status_counts"] == {"WebNudge": 1}
+    assert summaries[0]["no_contact_call_results"] == {}
+
+
+class StoredCallHistoryQuery:
+    def __init__(self, stored_calls, fetched_days):
+        self.stored_calls = stored_calls
+        self.fetched_days = fetched_days
+        self.filters = []
+
+    def add_filter(self, property_name, operator, value):
+        self.filters.append((property_name, operator, value))
+
+    def fetch(self):
+        [day_start] = [value for _, operator, value in self.filters if operator == ">="]
+        [day_end] = [value for _, operator, value in self.filters if operator == "<"]
+        self.fetched_days.append(day_start.date())
+        return [
+            dict(call)
+            for call in self.stored_calls
+            if day_start <= call["call_start_time"] < day_end
+        ]
+
+
+@patch("data_sources.call_history_data.get_cati_call_history_fingerprint_from_database")
+@patch("data_sources.call_history_data.get_cati_call_history_from_database")
+def test_call_history_extraction_process_backfills_daily_summaries_from_stored_call_history(
+    mock_get_cati_call_history_from_database,
+    mock_get_cati_call_history_fingerprint_from_database,
+    config,
+):
+    # OPN2001A is no longer configured in CATI, so only Datastore has its calls.
+    last_month = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=30)
+    datastore_client = mock.MagicMock()
+    datastore_client.get.return_value = None
+    datastore_client.key.side_effect = lambda kind, name: datastore.Key(
+        kind, name, project="test"
+    )
+    datastore_client.query.side_effect = lambda kind: StoredCallHistoryQuery(
+        [
+            {
+                "interviewer": "matpal",
+                "questionnaire_name": "OPN2001A",
+                "survey": "OPN",
+                "call_start_time": last_month,
+                "call_end_time": last_month + timedelta(seconds=16),
+                "dial_secs": 16,
+                "status": "Finished (Non response)",
+                "call_result": "NoAnswer",
+                "outcome_code": "310",
+            }
+        ],
+        [],
+    )
+    mock_get_cati_call_history_fingerprint_from_database.return_value = []
+
+    CallHistoryClient(datastore_client, config).call_history_extraction_process()
+
+    mock_get_cati_call_history_from_database.assert_not_called()
+    summaries = [
+        summary
+        for call in datastore_client.put_multi.call_args_list
+        for summary in call.args[0]
+    ]
+    assert [summary.key.name for summary in summaries] == [
+        f"matpal-{last_month.date().isoformat()}-OPN2001A"
+    ]
+    assert summaries[0]["status_counts"] == {"Finished (Non response)": 1}
+    status = datastore_client.put.call_args[0][0]
+    assert status["daily_summaries_backfilled"] is True
+    assert status["daily_summaries_backfill_date"] is None
+    assert last_month.date().isoformat() in status["call_dates_last_updated"]
+
+
+@patch("data_sources.call_history_data.get_cati_call_history_fingerprint_from_database")
+@patch("data_sources.call_history_data.get_cati_call_history_from_database")
+def test_call_history_extraction_process_resumes_the_daily_summaries_backfill(
+    mock_get_cati_call_history_from_database,
+    mock_get_cati_call_history_fingerprint_from_database,
+    config,
+):
+    today = datetime.now(timezone.utc).date()
+    fetched_days = []
+    datastore_client = mock.MagicMock()
+    datastore_client.get.return_value = {
+        "last_dial_history_id": 0,
+        "last_full_reconcile": datetime.now(timezone.utc) - timedelta(days=1),
+        "dial_history_fingerprint": CallHistoryClient.generate_call_history_fingerprint(
+            []
+        ),
+        "daily_summaries_backfill_date": (today - timedelta(days=3)).isoformat(),
+    }
+    datastore_client.query.side_effect = lambda kind: StoredCallHistoryQuery(
+        [], fetched_days
+    )
+    mock_get_cati_call_history_fingerprint_from_database.return_value = []
+    call_history_client = CallHistoryClient(datastore_client, config)
+    call_history_client.SUMMARY_BACKFILL_CHECKPOINT_DAYS = 2
+
+    call_history_client.call_history_extraction_process()
+
+    mock_get_cati_call_history_from_database.assert_not_called()
+    assert sorted(fetched_days) == [
+        today - timedelta(days=2),
+        today - timedelta(days=1),
+        today,
+    ]
+    statuses = [call.args[0] for call in datastore_client.put.call_args_list]
+    assert [status["daily_summaries_backfill_date"] for status in statuses] == [
+        (today - timedelta(days=1)).isoformat(),
+        today.isoformat(),
+        None,
+    ]
+    assert [status.get("daily_summaries_backfilled") for status in statuses] == [
+        None,
+        None,
+        True,
+    ]
+
+
+def test_stamp_call_dates_stamps_changed_dates_and_drops_old_ones(config):
+    last_year = (datetime.now(timezone.utc) - timedelta(days=500)).date()
+    status = {
+        "call_dates_last_updated": {
+            last_year.isoformat(): datetime(2021, 1, 1),
+            "2099-01-01": datetime(2021, 1, 1),
+        }
+    }
+    today = datetime.now(timezone.utc).date()
+
+    stamps = CallHistoryClient(mock.MagicMock(), config).stamp_call_dates(
+        status, {today}
+    )
+
+    assert sorted(stamps) == [today.isoformat(), "2099-01-01"]
+    assert stamps["2099-01-01"] == datetime(2021, 1, 1)
+    assert stamps[today.isoformat()] > datetime.now(timezone.utc) - timedelta(minutes=1)
@@ -0,0 +1,70 @@
+from unittest import mock
+
+from functions.cache_functions import VersionedLRUCache
+
+
+def test_versioned_lru_cache_returns_a_value_for_the_same_version():
+    cache = VersionedLRUCache(max_size=2, ttl_seconds=60)
+    cache.set("key", ["record"], "v1")
+
+    assert cache.get("key", "v1") == ["record"]
+
+
+def test_versioned_lru_cache_drops_a_value_when_the_version_moves():
+    cache = VersionedLRUCache(max_size=2, ttl_seconds=60)
+    cache.set("key", ["record"], "v1")
+
+    assert cache.get("key", "v2") is None
+    assert len(cache) == 0
+
+
+@mock.patch("time.monotonic")
+def test_versioned_lru_cache_drops_a_value_after_its_ttl(mock_monotonic):
+    cache = VersionedLRUCache(max_size=2, ttl_seconds=60)
+    mock_monotonic.return_value = 100
+    cache.set("key", ["record"], "v1")
+
+    mock_monotonic.return_value = 161
+    assert cache.get("key", "v1") is None
+
+
+def test_versioned_lru_cache_evicts_the_least_recently_used_value():
+    cache = VersionedLRUCache(max_size=2, ttl_seconds=60)
+    cache.set("first", 1, "v1")
+    cache.set("second", 2, "v1")
+    cache.get("first", "v1")
+    cache.set("third", 3, "v1")
+
+    assert cache.get("first", "v1") == 1
+    assert cache.get("second", "v1") is None
+    assert cache.get("third", "v1") == 3
+
+
+def test_versioned_lru_cache_evicts_values_until_it_is_within_its_max_weight():
+    cache = VersionedLRUCache(max_size=10, ttl_seconds=60, max_weight=5)
+    cache.set("first", ["record"] * 2, "v1")
+    cache.set("second", ["record"] * 2, "v1")
+    cache.set("third", ["record"] * 2, "v1")
+
+    assert cache.get("first", "v1") is None
+    assert cache.get("second", "v1") == ["record"] * 2
+    assert cache.get("third", "v1") == ["record"] * 2
+
+
+def test_versioned_lru_cache_does_not_cache_a_value_heavier_than_its_max_weight():
+    cache = VersionedLRUCache(max_size=10, ttl_seconds=60, max_weight=5)
+    cache.set("small", ["record"], "v1")
+    cache.set("large", ["record"] * 6, "v1")
+
+    assert cache.get("large", "v1") is None
+    assert cache.get("small", "v1") == ["record"]
+
+
+def test_versioned_lru_cache_releases_the_weight_of_a_replaced_value():
+    cache = VersionedLRUCache(max_size=10, ttl_seconds=60, max_weight=5)
+    cache.set("first", ["record"] * 4, "v1")
+    cache.set("first", ["record"] * 4, "v2")
+    cache.set("second", ["record"], "v1")
+
+    assert cache.get("first", "v2") == ["record"] * 4
+    assert cache.get("second", "v1") == ["record"]
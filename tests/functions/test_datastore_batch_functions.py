@@ -0,0 +1,54 @@
+from unittest import mock
+
+import pytest
+from google.api_core import exceptions
+
+from functions.datastore_batch_functions import (
+    process_batch_with_retry,
+    process_batches_concurrently,
+)
+
+
+def test_process_batches_concurrently_processes_every_batch():
+    operation = mock.MagicMock()
+    batches = [[1, 2], [3, 4], [5]]
+
+    result = process_batches_concurrently(
+        operation, iter(batches), "Uploaded", max_workers=2
+    )
+
+    assert result == 5
+    assert sorted(call.args[0] for call in operation.call_args_list) == batches
+
+
+@mock.patch("time.sleep")
+def test_process_batch_with_retry_retries_transient_errors(mock_sleep):
+    operation = mock.MagicMock(
+        side_effect=[exceptions.ServiceUnavailable("unavailable"), None]
+    )
+
+    result = process_batch_with_retry(operation, [1, 2], "Uploaded", backoff_seconds=2)
+
+    assert result == 2
+    assert operation.call_count == 2
+    mock_sleep.assert_called_once_with(2)
+
+
+@mock.patch("time.sleep")
+def test_process_batch_with_retry_raises_once_retries_are_exhausted(mock_sleep):
+    operation = mock.MagicMock(side_effect=exceptions.DeadlineExceeded("timeout"))
+
+    with pytest.raises(exceptions.DeadlineExceeded):
+        process_batch_with_retry(operation, [1], "Uploaded", max_retries=2)
+
+    assert operation.call_count == 3
+    assert [call.args[0] for call in mock_sleep.call_args_list] == [1.0, 2.0]
+
+
+def test_process_batch_with_retry_does_not_retry_other_errors():
+    operation = mock.MagicMock(side_effect=ValueError("bad entity"))
+
+    with pytest.raises(ValueError):
+        process_batch_with_retry(operation, [1], "Uploaded")
+
+    assert operation.call_count == 1
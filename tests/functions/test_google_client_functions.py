@@ -0,0 +1,38 @@
+from unittest import mock
+
+import pytest
+
+from functions import google_client_functions
+from functions.google_client_functions import (
+    get_cloud_tasks_client,
+    get_datastore_client,
+    get_storage_bucket,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_clients():
+    google_client_functions.clear_clients()
+    yield
+    google_client_functions.clear_clients()
+
+
+@mock.patch("functions.google_client_functions.datastore.Client")
+def test_get_datastore_client_creates_the_client_once(mock_datastore_client):
+    assert get_datastore_client() is get_datastore_client()
+    mock_datastore_client.assert_called_once()
+
+
+@mock.patch("functions.google_client_functions.tasks_v2.CloudTasksClient")
+def test_get_cloud_tasks_client_creates_the_client_once(mock_cloud_tasks_client):
+    assert get_cloud_tasks_client() is get_cloud_tasks_client()
+    mock_cloud_tasks_client.assert_called_once()
+
+
+@mock.patch("functions.google_client_functions.storage.Client")
+def test_get_storage_bucket_fetches_each_bucket_once(mock_storage_client):
+    bucket = get_storage_bucket("nifi-staging")
+
+    assert get_storage_bucket("nifi-staging") is bucket
+    mock_storage_client.assert_called_once()
+    mock_storage_client.return_value.get_bucket.assert_called_once_with("nifi-staging")
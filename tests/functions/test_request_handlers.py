@@ -1,6 +1,11 @@
 import pytest
 
-from functions.request_handlers import date_handler, survey_tla_handler
+from functions.request_handlers import (
+    date_handler,
+    page_size_handler,
+    response_format_handler,
+    survey_tla_handler,
+)
 from models.error_capture import BertException
 
 
@@ -118,3 +123,22 @@ def test_survey_tla_handler_returns_upper_case_tla(client, survey_tla, expected)
         f"/api/reports/call-history/matpal?start-date=2021-01-01&end-date=2021-01-01&survey-tla={survey_tla}"
     ).request
     assert survey_tla_handler(request) == expected
+
+
+@pytest.mark.parametrize("page_size", ["0", "-1", "abc", "1001"])
+def test_page_size_handler_returns_error_when_page_size_is_not_valid(client, page_size):
+    request = client.get(
+        f"/api/reports/call-history/matpal?start-date=2021-01-01&end-date=2021-01-01&page-size={page_size}"
+    ).request
+    with pytest.raises(BertException) as err:
+        page_size_handler(request)
+    assert err.value.code == 400
+
+
+def test_response_format_handler_returns_error_for_an_unknown_format(client):
+    request = client.get(
+        "/api/reports/call-history/matpal?start-date=2021-01-01&end-date=2021-01-01&format=xml"
+    ).request
+    with pytest.raises(BertException) as err:
+        response_format_handler(request)
+    assert err.value.code == 400
@@ -1,4 +1,11 @@
-from models.call_history_model import CallHistory, CatiCallHistoryTable
+from dataclasses import asdict
+from unittest.mock import patch
+
+from models.call_history_model import (
+    CallHistory,
+    CatiCallHistoryTable,
+    parse_questionnaire_details,
+)
 
 
 def test_generate_questionnaire_details_lms():
@@ -94,3 +101,100 @@ def test_generate_questionnaire_details_lms_dodgy_iterations():
     assert call_history.survey == "LMS"
     assert call_history.wave is None
     assert call_history.cohort is None
+
+
+@patch("models.database_base_model.DatabaseBase.iter_query")
+def test_iter_cati_history_records_filters_on_the_dial_history_id_range(
+    iter_query, config
+):
+    CatiCallHistoryTable.iter_cati_history_records(config, 90, 120)
+
+    sql_query = iter_query.call_args[0][1]
+    assert "WHERE DH.Id > %s AND DH.Id <= %s" in sql_query
+    assert iter_query.call_args[0][2] == [90, 120]
+
+
+@patch("models.database_base_model.DatabaseBase.iter_query")
+def test_iter_cati_history_records_without_an_id_range_has_no_filter(
+    iter_query, config
+):
+    CatiCallHistoryTable.iter_cati_history_records(config)
+
+    assert "WHERE" not in iter_query.call_args[0][1]
+    assert iter_query.call_args[0][2] is None
+
+
+@patch("models.database_base_model.DatabaseBase.query")
+def test_get_fingerprint_summarises_dial_history_per_instrument(query, config):
+    CatiCallHistoryTable.get_fingerprint(config)
+
+    sql_query = " ".join(query.call_args[0][1].split())
+    assert (
+        "SELECT InstrumentId, COUNT(*) AS Total, MIN(Id) AS MinId, MAX(Id) AS MaxId, MAX(EndTime) AS MaxEndTime"
+        in sql_query
+    )
+    assert "GROUP BY InstrumentId" in sql_query
+
+
+def test_call_history_to_entity_dict_matches_asdict():
+    call_history = CallHistory(
+        "1001041",
+        1,
+        1,
+        0,
+        "2021-05-12 13:10:03.4471819",
+        "2021-05-12 13:10:35.0991819",
+        31,
+        "Finished (No contact)",
+        "Edwin",
+        "Busy",
+        None,
+        None,
+        "LMS2101_AA1",
+    )
+    call_history.generate_questionnaire_details()
+
+    assert call_history.to_entity_dict() == asdict(call_history)
+    assert not hasattr(call_history, "__dict__")
+
+
+def test_call_history_datastore_key_name():
+    call_history = CallHistory(
+        "1001041",
+        1,
+        2,
+        0,
+        "2021-05-12 13:10:03.4471819",
+        "2021-05-12 13:10:35.0991819",
+        31,
+        "Finished (No contact)",
+        "Edwin",
+        "Busy",
+        None,
+        None,
+        "LMS2101_AA1",
+    )
+
+    assert (
+        call_history.datastore_key_name()
+        == "1-2-0-LMS2101_AA1-1001041-2021-05-12 13:10:03.4471819"
+    )
+
+
+def test_parse_questionnaire_details_is_memoised_per_questionnaire():
+    parse_questionnaire_details.cache_clear()
+
+    parse_questionnaire_details("LMS2101_AA1")
+    parse_questionnaire_details("LMS2101_AA1")
+
+    assert parse_questionnaire_details("LMS2101_AA1") == ("LMS", 1, "AA")
+    assert parse_questionnaire_details.cache_info().misses == 1
+
+
+@patch("models.database_base_model.DatabaseBase.iter_query")
+def test_iter_cati_history_records_filters_on_the_instrument(iter_query, config):
+    CatiCallHistoryTable.iter_cati_history_records(config, 90, 120, "guid_id_example_1")
+
+    sql_query = iter_query.call_args[0][1]
+    assert "WHERE DH.Id > %s AND DH.Id <= %s AND DH.InstrumentId = %s" in sql_query
+    assert iter_query.call_args[0][2] == [90, 120, "guid_id_example_1"]
@@ -1,6 +1,10 @@
-from dataclasses import dataclass
-from unittest.mock import patch
+from dataclasses import dataclass, replace
+from unittest.mock import ANY, patch
 
+import mysql.connector
+import pytest
+
+from models import database_base_model
 from models.database_base_model import DatabaseBase
 
 
@@ -46,3 +50,135 @@ def test_database_base_model_select_from_returns_the_expected_query_result(
         ("row_1_value_for_field_name_1", 1, False),
         ("row_2_value_for_field_name_1", 2, True),
     ]
+
+
+@patch("models.database_base_model.DatabaseBase.connect_to_database")
+def test_database_base_model_iter_query_streams_rows_in_chunks(
+    connect_to_database, config
+):
+    # arrange
+    db = connect_to_database.return_value
+    cursor = db.cursor.return_value
+    cursor.fetchmany.side_effect = [[{"id": 1}, {"id": 2}], [{"id": 3}], []]
+
+    # act
+    result = list(ExampleTableModel.iter_query(config, "SELECT 1", chunk_size=2))
+
+    # assert
+    assert result == [{"id": 1}, {"id": 2}, {"id": 3}]
+    db.cursor.assert_called_with(dictionary=True, buffered=False)
+    cursor.fetchmany.assert_called_with(2)
+    cursor.fetchall.assert_not_called()
+    cursor.close.assert_called_once()
+    db.close.assert_called_once()
+
+
+@patch("models.database_base_model.DatabaseBase.connect_to_database")
+def test_database_base_model_iter_query_releases_the_connection_when_closed_early(
+    connect_to_database, config
+):
+    # arrange
+    db = connect_to_database.return_value
+    cursor = db.cursor.return_value
+    cursor.fetchmany.return_value = [{"id": 1}, {"id": 2}]
+
+    # act
+    rows = ExampleTableModel.iter_query(config, "SELECT 1")
+    next(rows)
+    rows.close()
+
+    # assert
+    db.consume_results.assert_called_once()
+    db.close.assert_called_once()
+
+
+@pytest.fixture
+def connection_pools():
+    database_base_model._connection_pools.clear()
+    database_base_model._connection_pool_sizes.clear()
+    yield database_base_model._connection_pools
+    database_base_model._connection_pools.clear()
+    database_base_model._connection_pool_sizes.clear()
+
+
+@patch("mysql.connector.pooling.MySQLConnectionPool")
+def test_database_base_model_reuses_the_connection_pool_for_the_same_settings(
+    connection_pool, connection_pools, config
+):
+    # act
+    first_connection = ExampleTableModel.connect_to_database(config)
+    second_connection = ExampleTableModel.connect_to_database(replace(config))
+
+    # assert
+    connection_pool.assert_called_once_with(
+        pool_name=ANY,
+        pool_size=ExampleTableModel.POOL_SIZE,
+        pool_reset_session=True,
+    )
+    connection_pool.return_value.set_config.assert_called_once_with(
+        host="blah", user="blah", password="blah", database="blah"
+    )
+    assert len(connection_pools) == 1
+    assert first_connection == connection_pool.return_value.get_connection.return_value
+    assert second_connection == first_connection
+
+
+@patch("mysql.connector.pooling.MySQLConnectionPool")
+def test_database_base_model_opens_pooled_connections_as_they_are_needed(
+    connection_pool, connection_pools, config
+):
+    # arrange
+    pooled_connection = object()
+    connection_pool.return_value.get_connection.side_effect = [
+        mysql.connector.errors.PoolError("Failed getting connection; pool exhausted"),
+        pooled_connection,
+    ]
+
+    # act
+    result = ExampleTableModel.connect_to_database(config)
+
+    # assert
+    assert result == pooled_connection
+    connection_pool.return_value.add_connection.assert_called_once_with()
+
+
+@patch("mysql.connector.connect")
+@patch("mysql.connector.pooling.MySQLConnectionPool")
+def test_database_base_model_opens_an_unpooled_connection_when_the_pool_is_exhausted(
+    connection_pool, connect, connection_pools, config
+):
+    # arrange
+    connection_pool.return_value.get_connection.side_effect = (
+        mysql.connector.errors.PoolError("Failed getting connection; pool exhausted")
+    )
+
+    # act
+    for _ in range(ExampleTableModel.POOL_SIZE):
+        ExampleTableModel.connect_to_database(config)
+    result = ExampleTableModel.connect_to_database(config)
+
+    # assert
+    assert result == connect.return_value
+    assert (
+        connection_pool.return_value.add_connection.call_count
+        == ExampleTableModel.POOL_SIZE
+    )
+    connect.assert_called_with(
+        host="blah", user="blah", password="blah", database="blah"
+    )
+
+
+@patch("models.database_base_model.DatabaseBase.connect_to_database")
+def test_database_base_model_query_releases_the_connection_when_the_query_fails(
+    connect_to_database, config
+):
+    # arrange
+    db = connect_to_database.return_value
+    cursor = db.cursor.return_value
+    cursor.execute.side_effect = mysql.connector.errors.ProgrammingError("bad query")
+
+    # act & assert
+    with pytest.raises(mysql.connector.errors.ProgrammingError):
+        ExampleTableModel.query(config, "SELECT 1")
+    cursor.close.assert_called_once()
+    db.close.assert_called_once()
@@ -0,0 +1,124 @@
+import datetime
+
+from google.cloud import datastore
+from google.cloud.datastore import helpers
+
+from models.interviewer_daily_summary_model import InterviewerDailySummary
+from tests.helpers.interviewer_call_pattern_helpers import (
+    datetime_helper,
+    interviewer_call_pattern_report_sample_case,
+)
+
+
+def test_from_call_history_records_groups_calls_by_interviewer_day_and_questionnaire():
+    records = [
+        {
+            **interviewer_call_pattern_report_sample_case(
+                call_start_time=datetime_helper(day=7, hour=hour),
+                call_end_time=datetime_helper(day=7, hour=hour + 1),
+                dial_secs=60,
+            ),
+            "questionnaire_name": questionnaire_name,
+        }
+        for hour, questionnaire_name in [
+            (9, "OPN2101A"),
+            (11, "OPN2101A"),
+            (13, "OPN2101B"),
+        ]
+    ]
+
+    summaries = InterviewerDailySummary.from_call_history_records(records)
+
+    assert [
+        (summary.date, summary.questionnaire_name, summary.total_records)
+        for summary in summaries
+    ] == [
+        (datetime.date(2021, 8, 7), "OPN2101A", 2),
+        (datetime.date(2021, 8, 7), "OPN2101B", 1),
+    ]
+    assert summaries[0].first_call_start_time == datetime_helper(day=7, hour=9)
+    assert summaries[0].last_call_end_time == datetime_helper(day=7, hour=12)
+    assert summaries[0].dial_secs == 120
+
+
+def test_add_record_only_counts_valid_calls_towards_time_and_call_results():
+    summary = InterviewerDailySummary(
+        interviewer="James",
+        date=datetime.date(2021, 8, 7),
+        questionnaire_name="OPN2101A",
+    )
+
+    summary.add_record(
+        interviewer_call_pattern_report_sample_case(
+            status="Finished (No contact)", call_result="Busy", outcome_code="320"
+        )
+    )
+    summary.add_record(
+        interviewer_call_pattern_report_sample_case(
+            call_end_time=None, status="Timed out", dial_secs=600
+        )
+    )
+    summary.add_record(interviewer_call_pattern_report_sample_case(call_end_time=""))
+
+    assert summary.total_records == 3
+    assert summary.valid_records == 1
+    assert summary.dial_secs == 8
+    assert summary.timed_out_records == 1
+    assert summary.missing_call_end_time == 2
+    assert summary.invalid_telephone_numbers == 1
+    assert summary.status_counts == {
+        "Finished (No contact)": 1,
+        "Timed out": 1,
+        "Completed": 1,
+    }
+    assert summary.no_contact_call_results == {"Busy": 1}
+
+
+def test_from_entity_round_trips_the_entity_dict():
+    summary = InterviewerDailySummary.from_call_history_records(
+        [
+            {
+                **interviewer_call_pattern_report_sample_case(),
+                "questionnaire_name": "OPN2101A",
+                "survey": "OPN",
+            }
+        ]
+    )[0]
+
+    entity = summary.to_entity_dict()
+
+    assert entity["date"] == datetime.datetime(2021, 8, 7)
+    assert summary.datastore_key_name() == "James-2021-08-07-OPN2101A"
+    assert InterviewerDailySummary.from_entity(entity) == summary
+
+
+def test_entity_dict_serialises_when_statuses_and_call_results_are_missing():
+    summary = InterviewerDailySummary.from_call_history_records(
+        [
+            {
+                **interviewer_call_pattern_report_sample_case(
+                    status="Finished (No contact)", call_result=call_result
+                ),
+                "questionnaire_name": "OPN2101A",
+            }
+            for call_result in [None, "", "Busy"]
+        ]
+        + [
+            {
+                **interviewer_call_pattern_report_sample_case(status=status),
+                "questionnaire_name": "OPN2101A",
+            }
+            for status in [None, ""]
+        ]
+    )[0]
+    entity = datastore.Entity(
+        datastore.Key("InterviewerDailySummary", "James", project="test"),
+        exclude_from_indexes=("status_counts", "no_contact_call_results"),
+    )
+    entity.update(summary.to_entity_dict())
+
+    helpers.entity_to_protobuf(entity)
+
+    assert summary.total_records == 5
+    assert summary.status_counts == {"Finished (No contact)": 3}
+    assert summary.no_contact_call_results == {"Busy": 1}
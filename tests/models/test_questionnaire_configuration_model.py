@@ -3,7 +3,17 @@ from unittest.mock import patch
 import pytest
 
 from models.error_capture import RowNotFound
-from models.questionnaire_configuration_model import QuestionnaireConfigurationTable
+from models.questionnaire_configuration_model import (
+    QuestionnaireConfigurationTable,
+    clear_questionnaire_names,
+)
+
+
+@pytest.fixture(autouse=True)
+def questionnaire_names():
+    clear_questionnaire_names()
+    yield
+    clear_questionnaire_names()
 
 
 @patch("models.database_base_model.DatabaseBase.query")
@@ -53,3 +63,140 @@ def test_get_questionnaire_name_from_id_throws_row_not_found_exception(query, co
         QuestionnaireConfigurationTable.get_questionnaire_name_from_id(
             config, "guid_id_example_1"
         )
+
+
+@patch("models.database_base_model.DatabaseBase.query")
+def test_get_questionnaire_names_by_id_executes_as_expected(query, config):
+    # arrange
+    query.return_value = [
+        {"InstrumentId": "guid_id_example_1", "InstrumentName": "LMS2202A"},
+        {"InstrumentId": "guid_id_example_2", "InstrumentName": "LMS2202B"},
+    ]
+
+    # act
+    result = QuestionnaireConfigurationTable.get_questionnaire_names_by_id(config)
+
+    # assert
+    query.assert_called_with(
+        config, "SELECT InstrumentId, InstrumentName FROM configuration.Configuration"
+    )
+    assert result == {
+        "guid_id_example_1": "LMS2202A",
+        "guid_id_example_2": "LMS2202B",
+    }
+
+
+@patch("models.database_base_model.DatabaseBase.query")
+def test_get_cached_questionnaire_name_from_id_loads_all_names_in_one_query(
+    query, config
+):
+    # arrange
+    query.return_value = [
+        {"InstrumentId": "guid_id_example_1", "InstrumentName": "LMS2202A"},
+        {"InstrumentId": "guid_id_example_2", "InstrumentName": "LMS2202B"},
+    ]
+
+    # act
+    results = [
+        QuestionnaireConfigurationTable.get_cached_questionnaire_name_from_id(
+            config, questionnaire_id
+        )
+        for questionnaire_id in [
+            "guid_id_example_1",
+            "guid_id_example_2",
+            "guid_id_example_1",
+        ]
+    ]
+
+    # assert
+    assert results == ["LMS2202A", "LMS2202B", "LMS2202A"]
+    query.assert_called_once()
+
+
+@patch("models.questionnaire_configuration_model.time.monotonic")
+@patch("models.database_base_model.DatabaseBase.query")
+def test_get_cached_questionnaire_name_from_id_reloads_names_when_expired(
+    query, monotonic, config
+):
+    # arrange
+    query.return_value = [
+        {"InstrumentId": "guid_id_example_1", "InstrumentName": "LMS2202A"}
+    ]
+    monotonic.return_value = 1000
+    QuestionnaireConfigurationTable.get_cached_questionnaire_name_from_id(
+        config, "guid_id_example_1"
+    )
+    query.return_value = [
+        {"InstrumentId": "guid_id_example_1", "InstrumentName": "LMS2202B"}
+    ]
+
+    # act
+    monotonic.return_value = 1000 + 899
+    before_expiry = (
+        QuestionnaireConfigurationTable.get_cached_questionnaire_name_from_id(
+            config, "guid_id_example_1"
+        )
+    )
+    monotonic.return_value = 1000 + 901
+    after_expiry = (
+        QuestionnaireConfigurationTable.get_cached_questionnaire_name_from_id(
+            config, "guid_id_example_1"
+        )
+    )
+
+    # assert
+    assert before_expiry == "LMS2202A"
+    assert after_expiry == "LMS2202B"
+    assert query.call_count == 2
+
+
+@patch("models.questionnaire_configuration_model.time.monotonic")
+@patch("models.database_base_model.DatabaseBase.query")
+def test_get_cached_questionnaire_name_from_id_reloads_names_on_a_miss(
+    query, monotonic, config
+):
+    # arrange
+    query.return_value = [
+        {"InstrumentId": "guid_id_example_1", "InstrumentName": "LMS2202A"}
+    ]
+    monotonic.return_value = 1000
+    QuestionnaireConfigurationTable.get_cached_questionnaire_name_from_id(
+        config, "guid_id_example_1"
+    )
+    query.return_value = [
+        {"InstrumentId": "guid_id_example_1", "InstrumentName": "LMS2202A"},
+        {"InstrumentId": "guid_id_example_2", "InstrumentName": "LMS2202B"},
+    ]
+
+    # act
+    monotonic.return_value = 1000 + 61
+    result = QuestionnaireConfigurationTable.get_cached_questionnaire_name_from_id(
+        config, "guid_id_example_2"
+    )
+
+    # assert
+    assert result == "LMS2202B"
+    assert query.call_count == 2
+
+
+@patch("models.questionnaire_configuration_model.time.monotonic")
+@patch("models.database_base_model.DatabaseBase.query")
+def test_get_cached_questionnaire_name_from_id_does_not_reload_for_repeated_misses(
+    query, monotonic, config
+):
+    # arrange
+    query.return_value = [
+        {"InstrumentId": "guid_id_example_1", "InstrumentName": "LMS2202A"}
+    ]
+    monotonic.return_value = 1000
+
+    # act & assert
+    for _ in range(3):
+        with pytest.raises(
+            RowNotFound,
+            match="Could not find configuration with InstrumentId: guid_id_example_2",
+        ):
+            QuestionnaireConfigurationTable.get_cached_questionnaire_name_from_id(
+                config, "guid_id_example_2"
+            )
+    query.assert_called_once()
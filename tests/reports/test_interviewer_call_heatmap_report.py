@@ -0,0 +1,115 @@
+import datetime
+
+from reports.interviewer_call_heatmap_report import get_call_heatmap_report
+from tests.helpers.interviewer_call_pattern_helpers import (
+    datetime_helper,
+    interviewer_call_pattern_report_sample_case,
+)
+
+
+def test_get_call_heatmap_report_bins_valid_calls_by_weekday_and_hour(
+    mocker, interviewer_name, start_date_as_string, end_date_as_string, survey_tla
+):
+    datastore_records = [
+        interviewer_call_pattern_report_sample_case(
+            call_start_time=datetime_helper(day=9, hour=10),
+            call_end_time=datetime_helper(day=9, hour=11),
+            dial_secs=60,
+            status="Completed",
+        ),
+        interviewer_call_pattern_report_sample_case(
+            call_start_time=datetime_helper(day=9, hour=10),
+            call_end_time=datetime_helper(day=9, hour=11),
+            dial_secs=30,
+            status="Finished (No contact)",
+        ),
+        interviewer_call_pattern_report_sample_case(
+            call_start_time=datetime_helper(day=10, hour=14),
+            call_end_time=datetime_helper(day=10, hour=15),
+            dial_secs=None,
+            status="Completed",
+        ),
+        interviewer_call_pattern_report_sample_case(
+            call_start_time=datetime_helper(day=10, hour=16),
+            call_end_time=None,
+            status="Completed",
+        ),
+        interviewer_call_pattern_report_sample_case(
+            call_start_time=datetime_helper(day=10, hour=17),
+            call_end_time=datetime_helper(day=10, hour=18),
+            status="Timed out",
+        ),
+    ]
+    mocker.patch(
+        "reports.interviewer_call_heatmap_report.get_call_history_records",
+        return_value=datastore_records,
+    )
+
+    result = get_call_heatmap_report(
+        interviewer_name, start_date_as_string, end_date_as_string, survey_tla
+    )
+
+    assert [(cell.weekday, cell.hour) for cell in result] == [
+        ("Monday", 11),
+        ("Tuesday", 15),
+    ]
+    assert result[0].calls == 2
+    assert result[0].dial_secs == 90
+    assert result[0].outcomes == {"Completed": 1, "Finished (No contact)": 1}
+    assert result[1].calls == 1
+    assert result[1].dial_secs == 0
+    assert result[1].outcomes == {"Completed": 1}
+
+
+def test_get_call_heatmap_report_bins_calls_in_uk_local_time(
+    mocker, interviewer_name, start_date_as_string, end_date_as_string, survey_tla
+):
+    datastore_records = [
+        interviewer_call_pattern_report_sample_case(
+            call_start_time=datetime.datetime(
+                2021, 8, 8, 23, 30, tzinfo=datetime.timezone.utc
+            ),
+            call_end_time=datetime.datetime(
+                2021, 8, 8, 23, 45, tzinfo=datetime.timezone.utc
+            ),
+        ),
+        interviewer_call_pattern_report_sample_case(
+            call_start_time=datetime.datetime(
+                2021, 12, 6, 10, 0, tzinfo=datetime.timezone.utc
+            ),
+            call_end_time=datetime.datetime(
+                2021, 12, 6, 10, 15, tzinfo=datetime.timezone.utc
+            ),
+        ),
+    ]
+    mocker.patch(
+        "reports.interviewer_call_heatmap_report.get_call_history_records",
+        return_value=datastore_records,
+    )
+
+    result = get_call_heatmap_report(
+        interviewer_name, start_date_as_string, end_date_as_string, survey_tla
+    )
+
+    # Sunday 23:30 UTC in August is 00:30 on Monday in BST, while December
+    # calls are already in GMT.
+    assert [(cell.weekday, cell.hour) for cell in result] == [
+        ("Monday", 0),
+        ("Monday", 10),
+    ]
+
+
+def test_get_call_heatmap_report_returns_an_empty_list_without_valid_calls(
+    mocker, interviewer_name, start_date_as_string, end_date_as_string, survey_tla
+):
+    mocker.patch(
+        "reports.interviewer_call_heatmap_report.get_call_history_records",
+        return_value=[interviewer_call_pattern_report_sample_case(call_end_time=None)],
+    )
+
+    assert (
+        get_call_heatmap_report(
+            interviewer_name, start_date_as_string, end_date_as_string, survey_tla
+        )
+        == []
+    )
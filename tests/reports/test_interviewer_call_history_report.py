@@ -1,16 +1,33 @@
 import datetime
+from unittest import mock
 from unittest.mock import patch
 
 import pytest
 from google.api_core.datetime_helpers import DatetimeWithNanoseconds
+from google.cloud import datastore
+from google.cloud.datastore import helpers
+from google.cloud.datastore.query import Iterator, Query
+from google.cloud.datastore_v1.types import datastore as datastore_pb2
+from google.cloud.datastore_v1.types import query as query_pb2
 
 from functions.datastore_functions import (
     get_call_history_records,
+    get_call_history_records_page,
     get_datastore_records,
+    get_datastore_records_for_questionnaire,
     get_questionnaires,
+    iter_call_history_records,
 )
 from models.error_capture import BertException
+from reports.interviewer_call_history_report import (
+    get_call_history_report_with_call_pattern,
+)
 from tests.helpers.interviewer_call_history_helpers import entity_builder
+from tests.helpers.interviewer_call_pattern_helpers import (
+    interviewer_call_pattern_report_sample_case,
+)
+
+MoreResultsType = query_pb2.QueryResultBatch.MoreResultsType
 
 
 def test_get_call_history_records_with_invalid_dates(interviewer_name, invalid_date):
@@ -53,6 +70,7 @@ def test_get_call_history_records_with_one_datastore_entity(
         datetime.datetime(2021, 9, 22, 23, 59, 59),
         None,
         None,
+        None,
     )
 
 
@@ -511,8 +529,61 @@ def test_get_datastore_records_returns_expected_result_when_called_with_calls_ou
         assert result == expected
 
 
-@patch("functions.datastore_functions.get_datastore_records")
+@patch("functions.datastore_functions.get_datastore_client")
 def test_get_call_history_instruments_returns_a_list_of_unique_questionnaires(
+    mock_get_datastore_client,
+    interviewer_name,
+    start_date_as_string,
+    end_date_as_string,
+):
+    query = mock_get_datastore_client.return_value.query.return_value
+    query.fetch.return_value = [
+        {"questionnaire_name": "LMS2202_TST"},
+        {"questionnaire_name": "LMS2202_TST"},
+        {"questionnaire_name": "LMS2101_AA1"},
+    ]
+
+    results = get_questionnaires(
+        interviewer_name, start_date_as_string, end_date_as_string, "LMS"
+    )
+
+    assert set(results) == {"LMS2101_AA1", "LMS2202_TST"}
+    mock_get_datastore_client.return_value.query.assert_called_with(kind="CallHistory")
+    assert query.add_filter.call_args_list == [
+        mock.call("interviewer", "=", interviewer_name),
+        mock.call("call_start_time", ">=", datetime.datetime(2021, 9, 22, 0, 0)),
+        mock.call("call_start_time", "<=", datetime.datetime(2021, 9, 22, 23, 59, 59)),
+        mock.call("survey", "=", "LMS"),
+    ]
+    assert query.projection == ["questionnaire_name"]
+
+
+@patch("functions.datastore_functions.get_datastore_client")
+def test_get_call_history_instruments_reads_the_daily_summaries_when_they_are_available(
+    mock_get_datastore_client,
+    call_history_status,
+    interviewer_name,
+    start_date_as_string,
+    end_date_as_string,
+):
+    call_history_status.return_value = {"daily_summaries_backfilled": True}
+    query = mock_get_datastore_client.return_value.query.return_value
+    query.fetch.return_value = [{"questionnaire_name": "LMS2202_TST"}]
+
+    results = get_questionnaires(
+        interviewer_name, start_date_as_string, end_date_as_string, None
+    )
+
+    assert results == ["LMS2202_TST"]
+    mock_get_datastore_client.return_value.query.assert_called_with(
+        kind="InterviewerDailySummary"
+    )
+    call_history_status.assert_called_once_with()
+    query.add_filter.assert_any_call("date", ">=", datetime.datetime(2021, 9, 22, 0, 0))
+
+
+@patch("functions.datastore_functions.get_datastore_records")
+def test_get_call_history_records_with_a_list_of_questionnaires(
     mock_get_datastore_records,
     interviewer_name,
     start_date_as_string,
@@ -527,52 +598,40 @@ def test_get_call_history_instruments_returns_a_list_of_unique_questionnaires(
             end_date_as_string,
             arbitrary_outcome_code,
             "Completed",
-            "LMS2202_TST",
-        ),
-        entity_builder(
-            2,
-            interviewer_name,
-            start_date_as_string,
-            end_date_as_string,
-            arbitrary_outcome_code,
-            "Completed",
-            "LMS2202_TST",
-        ),
-        entity_builder(
-            1,
-            interviewer_name,
-            start_date_as_string,
-            end_date_as_string,
-            arbitrary_outcome_code,
-            "Completed",
-            "LMS2101_AA1",
-        ),
+        )
     ]
 
     mock_get_datastore_records.return_value = mock_datastore_entity
-    results = get_questionnaires(
-        interviewer_name, start_date_as_string, end_date_as_string, "LMS"
+    results = get_call_history_records(
+        interviewer_name,
+        start_date_as_string,
+        end_date_as_string,
+        survey_tla="LMS",
+        questionnaires=["LMS2202_TST", "LMS2101_AA1"],
     )
 
-    assert set(results) == {"LMS2101_AA1", "LMS2202_TST"}
+    assert len(results) == 1
+    assert results == mock_datastore_entity
     mock_get_datastore_records.assert_called_with(
         interviewer_name,
         datetime.datetime(2021, 9, 22, 0, 0),
         datetime.datetime(2021, 9, 22, 23, 59, 59),
         "LMS",
+        ["LMS2202_TST", "LMS2101_AA1"],
         None,
     )
 
 
 @patch("functions.datastore_functions.get_datastore_records")
-def test_get_call_history_records_with_a_list_of_questionnaires(
+def test_get_call_history_records_is_cached_until_call_history_is_updated(
     mock_get_datastore_records,
+    call_history_status,
     interviewer_name,
     start_date_as_string,
     end_date_as_string,
     arbitrary_outcome_code,
 ):
-    mock_datastore_entity = [
+    mock_get_datastore_records.return_value = [
         entity_builder(
             1,
             interviewer_name,
@@ -582,22 +641,304 @@ def test_get_call_history_records_with_a_list_of_questionnaires(
             "Completed",
         )
     ]
+    call_history_status.return_value = {
+        "last_updated": datetime.datetime(2021, 9, 22, 1)
+    }
 
-    mock_get_datastore_records.return_value = mock_datastore_entity
-    results = get_call_history_records(
+    first_results = get_call_history_records(
+        interviewer_name, start_date_as_string, end_date_as_string
+    )
+    second_results = get_call_history_records(
+        interviewer_name, start_date_as_string, end_date_as_string
+    )
+    call_history_status.return_value = {
+        "last_updated": datetime.datetime(2021, 9, 22, 2)
+    }
+    third_results = get_call_history_records(
+        interviewer_name, start_date_as_string, end_date_as_string
+    )
+
+    assert first_results == second_results == third_results
+    assert mock_get_datastore_records.call_count == 2
+
+
+@patch("functions.datastore_functions.get_datastore_records")
+def test_get_call_history_records_only_caches_a_wide_range_with_a_projection(
+    mock_get_datastore_records, call_history_status, interviewer_name
+):
+    mock_get_datastore_records.return_value = []
+    call_history_status.return_value = {
+        "last_updated": datetime.datetime(2021, 9, 22, 1)
+    }
+
+    for _ in range(2):
+        get_call_history_records(interviewer_name, "2021-08-01", "2021-08-31")
+    assert mock_get_datastore_records.call_count == 2
+
+    for _ in range(2):
+        get_call_history_records(
+            interviewer_name,
+            "2021-08-01",
+            "2021-08-31",
+            projection=["call_start_time"],
+        )
+    assert mock_get_datastore_records.call_count == 3
+
+
+@patch("functions.datastore_functions.get_datastore_client")
+@patch("functions.datastore_functions.get_datastore_records_for_questionnaire")
+def test_get_datastore_records_merges_the_ordered_records_of_each_questionnaire(
+    mock_get_datastore_records_for_questionnaire, _mock_client, interviewer_name
+):
+    records_by_questionnaire = {
+        "LMS2101_AA1": [
+            {"questionnaire_name": "LMS2101_AA1", "call_start_time": 1},
+            {"questionnaire_name": "LMS2101_AA1", "call_start_time": 4},
+        ],
+        "LMS2202_TST": [
+            {"questionnaire_name": "LMS2202_TST", "call_start_time": 2},
+            {"questionnaire_name": "LMS2202_TST", "call_start_time": 3},
+        ],
+    }
+    mock_get_datastore_records_for_questionnaire.side_effect = lambda _client, _interviewer, _start, _survey, _end, questionnaire, _projection: records_by_questionnaire[
+        questionnaire
+    ]
+
+    results = get_datastore_records(
+        interviewer_name,
+        datetime.datetime(2021, 9, 22),
+        datetime.datetime(2021, 9, 22, 23, 59, 59),
+        None,
+        ["LMS2101_AA1", "LMS2202_TST"],
+    )
+
+    assert [record["call_start_time"] for record in results] == [1, 2, 3, 4]
+    assert mock_get_datastore_records_for_questionnaire.call_count == 2
+
+
+def test_get_datastore_records_for_questionnaire_projects_the_requested_fields(
+    interviewer_name,
+):
+    client = mock.MagicMock()
+    client.query.return_value.fetch.return_value = [
+        {
+            "call_start_time": 1632268800000000,
+            "call_end_time": None,
+            "status": "Completed",
+        }
+    ]
+
+    results = get_datastore_records_for_questionnaire(
+        client,
+        interviewer_name,
+        datetime.datetime(2021, 9, 22),
+        None,
+        datetime.datetime(2021, 9, 22, 23, 59, 59),
+        None,
+        ["call_start_time", "call_end_time", "status"],
+    )
+
+    assert client.query.return_value.projection == [
+        "call_start_time",
+        "call_end_time",
+        "status",
+    ]
+    assert results == [
+        {
+            "call_start_time": datetime.datetime(
+                2021, 9, 22, tzinfo=datetime.timezone.utc
+            ),
+            "call_end_time": None,
+            "status": "Completed",
+        }
+    ]
+
+
+def run_query_response(outcome_codes, more_results, end_cursor):
+    response = datastore_pb2.RunQueryResponse()
+    for outcome_code in outcome_codes:
+        entity = datastore.Entity(
+            datastore.Key("CallHistory", outcome_code, project="test")
+        )
+        entity["outcome_code"] = outcome_code
+        response.batch.entity_results.append(
+            query_pb2.EntityResult(entity=helpers.entity_to_protobuf(entity))
+        )
+    response.batch.more_results = more_results
+    response.batch.end_cursor = end_cursor
+    return response
+
+
+def mock_datastore_query(mock_get_datastore_client, responses):
+    # Pages are read through the real query iterator, so the tests follow the
+    # RunQuery batches the way the client library does.
+    client = mock.MagicMock(
+        project="test", database="", namespace=None, current_transaction=None
+    )
+    client._datastore_api.run_query.side_effect = responses
+    query = mock_get_datastore_client.return_value.query.return_value
+    query.fetch.side_effect = lambda start_cursor, limit: Iterator(
+        Query(client, kind="CallHistory"),
+        client,
+        limit=limit,
+        start_cursor=start_cursor,
+    )
+    return query
+
+
+@patch("functions.datastore_functions.get_datastore_client")
+def test_get_call_history_records_page_returns_the_next_cursor_for_a_full_page(
+    mock_get_datastore_client,
+    interviewer_name,
+    start_date_as_string,
+    end_date_as_string,
+):
+    query = mock_datastore_query(
+        mock_get_datastore_client,
+        [
+            run_query_response(
+                ["120", "110"], MoreResultsType.MORE_RESULTS_AFTER_LIMIT, b"cursor"
+            )
+        ],
+    )
+
+    records, next_cursor = get_call_history_records_page(
         interviewer_name,
         start_date_as_string,
         end_date_as_string,
-        survey_tla="LMS",
         questionnaires=["LMS2202_TST", "LMS2101_AA1"],
+        page_size=2,
+        cursor="cHJldmlvdXM=",
     )
 
-    assert len(results) == 1
-    assert results == mock_datastore_entity
-    mock_get_datastore_records.assert_called_with(
-        interviewer_name,
-        datetime.datetime(2021, 9, 22, 0, 0),
-        datetime.datetime(2021, 9, 22, 23, 59, 59),
-        "LMS",
-        ["LMS2202_TST", "LMS2101_AA1"],
+    assert next_cursor == "Y3Vyc29y"
+    assert records[0]["status"] == "WebNudge"
+    query.fetch.assert_called_with(start_cursor="cHJldmlvdXM=", limit=2)
+    query.add_filter.assert_any_call(
+        "questionnaire_name", "IN", ["LMS2202_TST", "LMS2101_AA1"]
+    )
+
+
+@patch("functions.datastore_functions.get_datastore_client")
+def test_get_call_history_records_page_follows_a_short_batch_that_is_not_finished(
+    mock_get_datastore_client,
+    interviewer_name,
+    start_date_as_string,
+    end_date_as_string,
+):
+    mock_datastore_query(
+        mock_get_datastore_client,
+        [
+            run_query_response(["110"], MoreResultsType.NOT_FINISHED, b"first"),
+            run_query_response(
+                ["320"], MoreResultsType.MORE_RESULTS_AFTER_LIMIT, b"cursor"
+            ),
+        ],
+    )
+
+    records, next_cursor = get_call_history_records_page(
+        interviewer_name, start_date_as_string, end_date_as_string, page_size=2
+    )
+
+    assert [record["outcome_code"] for record in records] == ["110", "320"]
+    assert next_cursor == "Y3Vyc29y"
+
+
+@patch("functions.datastore_functions.get_datastore_client")
+def test_get_call_history_records_page_has_no_cursor_after_the_last_page(
+    mock_get_datastore_client,
+    interviewer_name,
+    start_date_as_string,
+    end_date_as_string,
+):
+    mock_datastore_query(
+        mock_get_datastore_client,
+        [run_query_response(["110"], MoreResultsType.NO_MORE_RESULTS, b"cursor")],
+    )
+
+    records, next_cursor = get_call_history_records_page(
+        interviewer_name, start_date_as_string, end_date_as_string, page_size=2
+    )
+
+    assert len(records) == 1
+    assert next_cursor is None
+
+
+@patch("functions.datastore_functions.get_datastore_client")
+def test_get_call_history_records_page_rejects_an_invalid_cursor(
+    mock_get_datastore_client,
+    interviewer_name,
+    start_date_as_string,
+    end_date_as_string,
+):
+    query = mock_get_datastore_client.return_value.query.return_value
+    query.fetch.side_effect = ValueError("Incorrect padding")
+
+    with pytest.raises(BertException) as err:
+        get_call_history_records_page(
+            interviewer_name,
+            start_date_as_string,
+            end_date_as_string,
+            cursor="not-a-cursor",
+        )
+
+    assert err.value.code == 400
+
+
+@patch("functions.datastore_functions.get_datastore_client")
+def test_iter_call_history_records_yields_records_as_they_are_fetched(
+    mock_get_datastore_client,
+    interviewer_name,
+    start_date_as_string,
+    end_date_as_string,
+):
+    query = mock_get_datastore_client.return_value.query.return_value
+    query.fetch.return_value = iter([{"outcome_code": "320"}, {"outcome_code": "110"}])
+
+    records = iter_call_history_records(
+        interviewer_name, start_date_as_string, end_date_as_string
+    )
+
+    assert next(records) == {
+        "outcome_code": "320",
+        "call_result": "InvalidPhoneNumber",
+    }
+    assert list(records) == [{"outcome_code": "110"}]
+
+
+def test_iter_call_history_records_raises_invalid_dates_before_streaming(
+    interviewer_name, invalid_date
+):
+    with pytest.raises(BertException):
+        iter_call_history_records(interviewer_name, invalid_date, invalid_date)
+
+
+@patch("reports.interviewer_call_history_report.get_call_history_records")
+def test_get_call_history_report_with_call_pattern_fetches_the_records_once(
+    mock_get_call_history_records,
+    interviewer_name,
+    start_date_as_string,
+    end_date_as_string,
+):
+    mock_get_call_history_records.return_value = [
+        {
+            **interviewer_call_pattern_report_sample_case(dial_secs=600),
+            "questionnaire_name": "OPN2101A",
+        },
+        {
+            **interviewer_call_pattern_report_sample_case(status="Timed out"),
+            "questionnaire_name": "OPN2101A",
+        },
+    ]
+
+    result = get_call_history_report_with_call_pattern(
+        interviewer_name, start_date_as_string, end_date_as_string, None, None
+    )
+
+    mock_get_call_history_records.assert_called_once_with(
+        interviewer_name, start_date_as_string, end_date_as_string, None, None
     )
+    assert result["records"] == mock_get_call_history_records.return_value
+    assert result["call_pattern"].total_valid_cases == 1
+    assert result["call_pattern"].call_time == "00:10:00"
+    assert result["call_pattern"].discounted_invalid_cases == 1
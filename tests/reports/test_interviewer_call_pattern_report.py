@@ -1,5 +1,9 @@
+import json
+import sys
+
 import pytest
 
+from models.interviewer_daily_summary_model import InterviewerDailySummary
 from reports.interviewer_call_pattern_report import *
 from tests.helpers.interviewer_call_pattern_helpers import (
     datetime_helper,
@@ -800,23 +804,22 @@ class TestCallTimes:
             (datetime_helper(day=7, hour=14), datetime_helper(day=7, hour=17), 0.33),
         ],
     )
-    def test_calculate_average_calls_per_hour(
+    def test_get_call_pattern_report_from_records_returns_average_calls_per_hour(
         self, call_start_time, call_end_time, expected
     ):
-        assert (
-            calculate_average_calls_per_hour(
-                pd.DataFrame(
-                    [
-                        interviewer_call_pattern_report_sample_case(
-                            call_start_time=call_start_time,
-                            call_end_time=call_end_time,
-                        )
-                    ]
+        records = load_call_pattern_records(
+            [
+                interviewer_call_pattern_report_sample_case(
+                    call_start_time=call_start_time,
+                    call_end_time=call_end_time,
                 )
-            )
-            == expected
+            ]
         )
 
+        result = get_call_pattern_report_from_records(records)
+
+        assert result.average_calls_per_hour == expected
+
     def test_get_call_pattern_report_returns_hours_worked_when_a_record_is_found(
         self,
         mocker,
@@ -1116,33 +1119,45 @@ class TestCallTimes:
 
 class TestCallStatus:
     @pytest.mark.parametrize(
-        "status_1, status_2, status_3, status_to_test, expected",
+        "status_1, status_2, status_3, expected_completed, expected_discounted",
         [
-            ("Completed", "Completed", "Timed out", "Completed", 2),
-            ("Completed", "Timed out", "Timed out", "Completed", 1),
-            ("Completed", "Completed", "Timed out", "Timed out", 1),
+            ("Completed", "Completed", "Timed out", 2, 1),
+            ("Completed", "Timed out", "Timed out", 1, 2),
+            ("Completed", "Completed", "Completed", 3, 0),
         ],
     )
-    def test_number_of_records_which_has_status(
-        self, status_1, status_2, status_3, status_to_test, expected
+    def test_get_call_pattern_report_from_records_counts_records_by_status(
+        self, status_1, status_2, status_3, expected_completed, expected_discounted
     ):
-        arrange = pd.DataFrame(
+        records = load_call_pattern_records(
             [
                 interviewer_call_pattern_report_sample_case(status=status_1),
                 interviewer_call_pattern_report_sample_case(status=status_2),
                 interviewer_call_pattern_report_sample_case(status=status_3),
             ]
         )
-        assert number_of_records_which_has_status(arrange, status_to_test) == expected
 
-    def test_number_of_records_which_has_status_raises_error_when_no_status_column_found(
+        result = get_call_pattern_report_from_records(records)
+
+        assert result.completed_successfully == expected_completed
+        assert result.discounted_invalid_cases == expected_discounted
+
+    def test_get_call_pattern_report_from_records_raises_error_when_no_status_column_found(
         self,
     ):
-        arrange = pd.DataFrame([{"call_status": "Completed"}])
+        records = load_call_pattern_records(
+            [
+                {
+                    "call_start_time": datetime_helper(day=7, hour=9),
+                    "call_end_time": datetime_helper(day=7, hour=10),
+                    "call_status": "Completed",
+                }
+            ]
+        )
 
         with pytest.raises(BertException) as excinfo:
-            number_of_records_which_has_status(arrange, "Completed")
-        assert "number_of_records_which_has_status failed" in excinfo.value.message
+            get_call_pattern_report_from_records(records)
+        assert "get_valid_records failed" in excinfo.value.message
 
     def test_percentages_equal_one_hundred(
         self,
@@ -1683,3 +1698,445 @@ class TestBreakdownOfNoContactCalls:
             interviewer_name, start_date_as_string, end_date_as_string, survey_tla
         )
         assert result.no_contact_other == 1
+
+
+def test_get_call_pattern_report_from_daily_summaries_matches_the_report_from_calls(
+    mocker, interviewer_name, start_date_as_string, end_date_as_string, survey_tla
+):
+    datastore_records = [
+        {
+            **interviewer_call_pattern_report_sample_case(
+                call_start_time=datetime_helper(day=8, hour=9),
+                call_end_time=datetime_helper(day=8, hour=10),
+                dial_secs=600,
+                status="Finished (No contact)",
+                call_result="NoAnswer",
+            ),
+            "questionnaire_name": "OPN2101A",
+        },
+        {
+            **interviewer_call_pattern_report_sample_case(
+                call_start_time=datetime_helper(day=8, hour=14),
+                call_end_time=datetime_helper(day=8, hour=16),
+                dial_secs=900,
+                status="Finished (No contact)",
+                call_result="InvalidPhoneNumber",
+                outcome_code="320",
+            ),
+            "questionnaire_name": "OPN2101B",
+        },
+        {
+            **interviewer_call_pattern_report_sample_case(
+                call_start_time=datetime_helper(day=9, hour=11),
+                call_end_time=datetime_helper(day=9, hour=12),
+                dial_secs=300,
+                status="WebNudge",
+                call_result="WebNudge",
+                outcome_code="120",
+            ),
+            "questionnaire_name": "OPN2101A",
+        },
+        {
+            **interviewer_call_pattern_report_sample_case(
+                call_start_time=datetime_helper(day=9, hour=13),
+                call_end_time=datetime_helper(day=9, hour=15),
+                dial_secs=1200,
+                status="Finished (Appointment made)",
+            ),
+            "questionnaire_name": "OPN2101A",
+        },
+        {
+            **interviewer_call_pattern_report_sample_case(
+                call_start_time=datetime_helper(day=9, hour=16),
+                call_end_time=None,
+                status="Timed out",
+            ),
+            "questionnaire_name": "OPN2101B",
+        },
+    ]
+    mocker.patch(
+        "reports.interviewer_call_pattern_report.get_call_history_records",
+        return_value=datastore_records,
+    )
+    report_from_calls = get_call_pattern_report(
+        interviewer_name, start_date_as_string, end_date_as_string, survey_tla
+    )
+
+    mocker.patch(
+        "reports.interviewer_call_pattern_report.get_interviewer_daily_summaries",
+        return_value=InterviewerDailySummary.from_call_history_records(
+            datastore_records
+        ),
+    )
+    report_from_daily_summaries = get_call_pattern_report(
+        interviewer_name, start_date_as_string, end_date_as_string, survey_tla
+    )
+
+    assert report_from_daily_summaries == report_from_calls
+    assert report_from_daily_summaries.hours_worked == "11:00:00"
+
+
+def test_get_call_pattern_report_from_daily_summaries_returns_an_empty_dict_without_calls():
+    assert get_call_pattern_report_from_daily_summaries([]) == {}
+
+
+def test_get_call_pattern_report_filters_the_valid_records_once(
+    mocker, interviewer_name, start_date_as_string, end_date_as_string, survey_tla
+):
+    datastore_records = [
+        interviewer_call_pattern_report_sample_case(
+            status="Finished (No contact)", call_result="Busy", outcome_code="320"
+        ),
+        interviewer_call_pattern_report_sample_case(status="Timed out"),
+    ]
+    mocker.patch(
+        "reports.interviewer_call_pattern_report.get_call_history_records",
+        return_value=datastore_records,
+    )
+    get_valid_records_spy = mocker.spy(
+        sys.modules["reports.interviewer_call_pattern_report"], "get_valid_records"
+    )
+
+    result = get_call_pattern_report(
+        interviewer_name,
+        start_date_as_string,
+        end_date_as_string,
+        survey_tla,
+        fast_path_threshold=0,
+    )
+
+    assert get_valid_records_spy.call_count == 1
+    assert json.loads(result.json())["no_contact_busy"] == 1
+    assert result.no_contact_invalid_telephone_number == 1
+    assert result.discounted_invalid_cases == 1
+
+
+def test_get_team_call_pattern_report_calculates_each_interviewer_from_one_fetch(
+    mocker, start_date_as_string, end_date_as_string, survey_tla
+):
+    datastore_records = [
+        {
+            **interviewer_call_pattern_report_sample_case(
+                call_start_time=datetime_helper(day=7, hour=9),
+                call_end_time=datetime_helper(day=7, hour=10),
+                dial_secs=600,
+            ),
+            "interviewer": interviewer,
+        }
+        for interviewer in ["James", "James", "Ellie", "Rich"]
+    ]
+    mock_get_team_call_history_records = mocker.patch(
+        "reports.interviewer_call_pattern_report.get_team_call_history_records",
+        return_value=datastore_records,
+    )
+
+    result = get_team_call_pattern_report(
+        start_date_as_string,
+        end_date_as_string,
+        survey_tla,
+        interviewers=["James", "Ellie"],
+    )
+
+    assert mock_get_team_call_history_records.call_count == 1
+    assert sorted(result) == ["Ellie", "James"]
+    assert result["James"].total_valid_cases == 2
+    assert result["James"].call_time == "00:20:00"
+    assert result["Ellie"].total_valid_cases == 1
+
+
+def test_get_team_call_pattern_report_returns_an_empty_dict_if_no_records_were_found(
+    mocker, start_date_as_string, end_date_as_string, survey_tla
+):
+    mocker.patch(
+        "reports.interviewer_call_pattern_report.get_team_call_history_records",
+        return_value=[],
+    )
+
+    assert (
+        get_team_call_pattern_report(
+            start_date_as_string, end_date_as_string, survey_tla
+        )
+        == {}
+    )
+
+
+@pytest.mark.parametrize("as_dataframe", [False, True])
+def test_load_call_pattern_records_builds_typed_columns(as_dataframe):
+    datastore_records = [
+        interviewer_call_pattern_report_sample_case(outcome_code="120"),
+        interviewer_call_pattern_report_sample_case(
+            call_end_time="", dial_secs=None, status="", call_result=""
+        ),
+    ]
+
+    records = load_call_pattern_records(
+        pd.DataFrame(datastore_records) if as_dataframe else datastore_records
+    )
+
+    assert str(records["call_start_time"].dtype) == "datetime64[us, UTC]"
+    assert str(records["call_end_time"].dtype) == "datetime64[us, UTC]"
+    assert str(records["dial_secs"].dtype) == "Int64"
+    assert isinstance(records["status"].dtype, pd.CategoricalDtype)
+    assert isinstance(records["call_result"].dtype, pd.CategoricalDtype)
+    assert records["call_end_time"].isna().tolist() == [False, True]
+    assert records["status"].isna().tolist() == [False, True]
+    assert records["dial_secs"].sum() == 8
+
+
+def test_load_call_pattern_records_keeps_fractional_dial_secs_as_floats():
+    records = load_call_pattern_records(
+        [
+            interviewer_call_pattern_report_sample_case(dial_secs=8.5),
+            interviewer_call_pattern_report_sample_case(dial_secs=None),
+        ]
+    )
+
+    assert str(records["dial_secs"].dtype) == "Float64"
+    assert records["dial_secs"].sum() == 8.5
+
+
+def test_get_call_pattern_report_treats_empty_call_times_as_missing_data(
+    mocker, interviewer_name, start_date_as_string, end_date_as_string, survey_tla
+):
+    datastore_records = [
+        interviewer_call_pattern_report_sample_case(),
+        interviewer_call_pattern_report_sample_case(call_end_time=""),
+    ]
+    mocker.patch(
+        "reports.interviewer_call_pattern_report.get_call_history_records",
+        return_value=datastore_records,
+    )
+
+    result = get_call_pattern_report(
+        interviewer_name, start_date_as_string, end_date_as_string, survey_tla
+    )
+
+    assert result.total_valid_cases == 1
+    assert result.invalid_fields == "'call_end_time' column had missing data"
+
+
+@pytest.mark.parametrize(
+    "datastore_records",
+    [
+        [
+            interviewer_call_pattern_report_sample_case(
+                call_start_time=datetime_helper(day=day, hour=hour),
+                call_end_time=datetime_helper(day=day, hour=hour + 1),
+                dial_secs=dial_secs,
+                status=status,
+                call_result=call_result,
+                outcome_code=outcome_code,
+            )
+            for day, hour, dial_secs, status, call_result, outcome_code in [
+                (7, 9, 600, "Completed", "Questionnaire", "110"),
+                (7, 13, 300, "Finished (No contact)", "NoAnswer", "310"),
+                (7, 15, None, "Finished (No contact)", "Busy", "320"),
+                (8, 10, 900, "WebNudge", "WebNudge", "120"),
+                (8, 14, 60, "Finished (Appointment made)", "Appointment", "300"),
+                (9, 11, 30, "Finished (Non response)", "NonRespons", "410"),
+            ]
+        ],
+        [
+            interviewer_call_pattern_report_sample_case(),
+            interviewer_call_pattern_report_sample_case(call_start_time=None),
+            interviewer_call_pattern_report_sample_case(call_end_time=""),
+            interviewer_call_pattern_report_sample_case(status="Timed out"),
+        ],
+        [
+            interviewer_call_pattern_report_sample_case(
+                call_end_time=None, status="Timed out"
+            )
+        ],
+        [
+            interviewer_call_pattern_report_sample_case(dial_secs=8.5),
+            interviewer_call_pattern_report_sample_case(dial_secs=12.25),
+        ],
+        [],
+    ],
+)
+def test_get_call_pattern_report_fast_path_matches_the_pandas_path(
+    mocker,
+    interviewer_name,
+    start_date_as_string,
+    end_date_as_string,
+    survey_tla,
+    datastore_records,
+):
+    mocker.patch(
+        "reports.interviewer_call_pattern_report.get_call_history_records",
+        return_value=datastore_records,
+    )
+    load_call_pattern_records_spy = mocker.spy(
+        sys.modules["reports.interviewer_call_pattern_report"],
+        "load_call_pattern_records",
+    )
+
+    fast_path_result = get_call_pattern_report(
+        interviewer_name, start_date_as_string, end_date_as_string, survey_tla
+    )
+    assert load_call_pattern_records_spy.call_count == 0
+
+    pandas_result = get_call_pattern_report(
+        interviewer_name,
+        start_date_as_string,
+        end_date_as_string,
+        survey_tla,
+        fast_path_threshold=0,
+    )
+    assert load_call_pattern_records_spy.call_count == 1
+
+    assert fast_path_result == pandas_result
+
+
+def test_get_call_pattern_report_only_reads_daily_summaries_for_days_that_are_not_cached_or_have_changed(
+    mocker, call_history_status, interviewer_name, survey_tla
+):
+    call_history_status.return_value = {
+        "last_updated": datetime.datetime(2021, 8, 9),
+        "call_dates_last_updated": {},
+    }
+    summaries_by_day = {
+        day: InterviewerDailySummary.from_call_history_records(
+            [
+                interviewer_call_pattern_report_sample_case(
+                    call_start_time=datetime_helper(day=day, hour=9),
+                    call_end_time=datetime_helper(day=day, hour=10),
+                    dial_secs=600,
+                )
+            ]
+        )
+        for day in range(1, 10)
+    }
+    mock_get_interviewer_daily_summaries = mocker.patch(
+        "reports.interviewer_call_pattern_report.get_interviewer_daily_summaries",
+        side_effect=lambda _interviewer, start_date, end_date, *_args: [
+            summary
+            for day in range(int(start_date[-2:]), int(end_date[-2:]) + 1)
+            for summary in summaries_by_day[day]
+        ],
+    )
+    mock_get_call_history_records = mocker.patch(
+        "reports.interviewer_call_pattern_report.get_call_history_records"
+    )
+
+    first_week = get_call_pattern_report(
+        interviewer_name, "2021-08-01", "2021-08-07", survey_tla
+    )
+    call_history_status.return_value = {
+        "last_updated": datetime.datetime(2021, 8, 10),
+        "call_dates_last_updated": {"2021-08-07": "stamp"},
+    }
+    second_week = get_call_pattern_report(
+        interviewer_name, "2021-08-02", "2021-08-08", survey_tla
+    )
+
+    assert [
+        call.args[1:3] for call in mock_get_interviewer_daily_summaries.call_args_list
+    ] == [("2021-08-01", "2021-08-07"), ("2021-08-07", "2021-08-08")]
+    mock_get_call_history_records.assert_not_called()
+    assert first_week.total_valid_cases == 7
+    assert second_week.total_valid_cases == 7
+    assert second_week.hours_worked == "07:00:00"
+
+
+def test_get_call_pattern_report_reads_calls_when_daily_summaries_are_not_available(
+    mocker, call_history_status, interviewer_name, survey_tla
+):
+    call_history_status.return_value = {
+        "last_updated": datetime.datetime(2021, 8, 9),
+        "call_dates_last_updated": {},
+    }
+    mocker.patch(
+        "reports.interviewer_call_pattern_report.get_interviewer_daily_summaries",
+        return_value=None,
+    )
+    mock_get_call_history_records = mocker.patch(
+        "reports.interviewer_call_pattern_report.get_call_history_records",
+        return_value=[
+            interviewer_call_pattern_report_sample_case(
+                call_start_time=datetime_helper(day=1, hour=9),
+                call_end_time=datetime_helper(day=1, hour=10),
+                dial_secs=600,
+            )
+        ],
+    )
+
+    report = get_call_pattern_report(
+        interviewer_name, "2021-08-01", "2021-08-07", survey_tla
+    )
+
+    mock_get_call_history_records.assert_called_once()
+    assert report.total_valid_cases == 1
+
+
+def test_get_call_pattern_report_honours_the_fast_path_threshold_once_call_history_has_a_status(
+    mocker, call_history_status, interviewer_name, survey_tla
+):
+    call_history_status.return_value = {
+        "last_updated": datetime.datetime(2021, 8, 9),
+        "call_dates_last_updated": {"2021-08-01": "stamp"},
+    }
+    mocker.patch(
+        "reports.interviewer_call_pattern_report.get_interviewer_daily_summaries",
+        return_value=None,
+    )
+    mocker.patch(
+        "reports.interviewer_call_pattern_report.get_call_history_records",
+        return_value=[
+            interviewer_call_pattern_report_sample_case(
+                call_start_time=datetime_helper(day=1, hour=9),
+                call_end_time=datetime_helper(day=1, hour=10),
+                dial_secs=600,
+            )
+        ],
+    )
+    load_call_pattern_records_spy = mocker.spy(
+        sys.modules["reports.interviewer_call_pattern_report"],
+        "load_call_pattern_records",
+    )
+
+    fast_path_result = get_call_pattern_report(
+        interviewer_name, "2021-08-01", "2021-08-07", survey_tla
+    )
+    assert load_call_pattern_records_spy.call_count == 0
+    pandas_result = get_call_pattern_report(
+        interviewer_name,
+        "2021-08-01",
+        "2021-08-07",
+        survey_tla,
+        fast_path_threshold=0,
+    )
+
+    assert load_call_pattern_records_spy.call_count == 1
+    assert fast_path_result == pandas_result
+
+
+def test_get_call_pattern_report_reads_the_call_history_status_once(
+    mocker, call_history_status, interviewer_name, survey_tla
+):
+    call_history_status.return_value = {
+        "last_updated": datetime.datetime(2021, 8, 9),
+        "call_dates_last_updated": {},
+        "daily_summaries_backfilled": True,
+    }
+    mock_get_datastore_client = mocker.patch(
+        "functions.datastore_functions.get_datastore_client"
+    )
+    mock_get_datastore_client.return_value.query.return_value.fetch.return_value = []
+    get_call_pattern_report(interviewer_name, "2021-08-04", "2021-08-04", survey_tla)
+    call_history_status.reset_mock()
+
+    get_call_pattern_report(interviewer_name, "2021-08-01", "2021-08-07", survey_tla)
+
+    assert mock_get_datastore_client.return_value.query.call_count == 3
+    call_history_status.assert_called_once_with()
+
+
+def test_group_consecutive_days():
+    days = [datetime.date(2021, 8, day) for day in [1, 2, 3, 5, 7, 8]]
+
+    assert group_consecutive_days(days) == [
+        (datetime.date(2021, 8, 1), datetime.date(2021, 8, 3)),
+        (datetime.date(2021, 8, 5), datetime.date(2021, 8, 5)),
+        (datetime.date(2021, 8, 7), datetime.date(2021, 8, 8)),
+    ]